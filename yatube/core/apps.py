@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = "core"
+
+    def ready(self):
+        from . import pagecache, ratelimit, snapshots  # noqa: F401
+
+        pagecache.tags_purged.connect(snapshots.tags_changed)
@@ -0,0 +1,114 @@
+"""Сжатие ответов gzip и brotli."""
+import gzip
+import hashlib
+import re
+import struct
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import brotli
+except ImportError:
+    # Есть в requirements.txt; без него и статика, и HTML — только gzip.
+    brotli = None
+
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# Уровни для ответов на лету и для статики, сжимаемой один раз.
+LEVELS = {"br": 5, "gzip": 6}
+MAX_LEVELS = {"br": 11, "gzip": 9}
+# Сжатое меньше исходного хотя бы на 5% — иначе смысла нет.
+MIN_RATIO = 0.95
+REFUSED = re.compile(r";\s*q=0(\.0*)?\s*$")
+# Заголовок gzip с mtime=0 и пустой последний блок deflate.
+GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+GZIP_END = b"\x03\x00"
+
+
+def available_encodings():
+    """Кодировки в порядке предпочтения."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def accepted_encodings(request):
+    header = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    return {
+        token.split(";")[0].strip().lower()
+        for token in header.split(",")
+        if not REFUSED.search(token)
+    }
+
+
+def choose_encoding(request):
+    accepted = accepted_encodings(request)
+    for encoding in available_encodings():
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compress(data, encoding, level=None):
+    level = level or LEVELS[encoding]
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def deflate(data):
+    # Каждый кусок сжимается с чистым словарём и заканчивается на границе
+    # байта, так что куски можно склеивать друг с другом.
+    compressor = zlib.compressobj(
+        LEVELS["gzip"], zlib.DEFLATED, -zlib.MAX_WBITS
+    )
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def gzip_segments(parts):
+    return [(len(part), deflate(part)) for part in parts]
+
+
+def join_gzip(segments, fills, data):
+    """gzip ``data`` из сжатых заранее кусков и вставок между ними."""
+    if len(segments) != len(fills) + 1 or len(data) != sum(
+        length for length, _ in segments
+    ) + sum(len(fill) for fill in fills):
+        return None
+    body = [GZIP_HEADER, segments[0][1]]
+    for fill, (_, segment) in zip(fills, segments[1:]):
+        body += [deflate(fill), segment]
+    body += [
+        GZIP_END,
+        struct.pack("<2I", zlib.crc32(data), len(data) & 0xFFFFFFFF),
+    ]
+    return b"".join(body)
+
+
+def worth_it(data, compressed):
+    return len(compressed) < len(data) * MIN_RATIO
+
+
+def compressed_key(data, encoding):
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    return f"compressed:{encoding}:{digest}"
+
+
+def compress_cached(data, encoding, timeout):
+    """Сжимает ``data``, запоминая результат в кэше по хэшу содержимого."""
+    key = compressed_key(data, encoding)
+    compressed = cache.get(key)
+    if compressed is None:
+        compressed = compress(data, encoding)
+        cache.set(key, compressed, timeout)
+    return compressed
+
+
+def compressible(response):
+    content_type = response.get("Content-Type", "").split(";")[0].strip()
+    return (
+        not response.streaming
+        and response.status_code == 200
+        and not response.has_header("Content-Encoding")
+        and content_type in settings.COMPRESS_TYPES
+        and len(response.content) >= settings.COMPRESS_MIN_SIZE
+    )
@@ -0,0 +1,57 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+_state = threading.local()
+
+PRIMARY_DB = "default"
+PRIMARY_ONLY_APPS = ("sessions", "admin", "contenttypes")
+
+
+def replica_reads_enabled():
+    return getattr(_state, "use_replica", False)
+
+
+@contextmanager
+def use_replica():
+    previous = replica_reads_enabled()
+    _state.use_replica = True
+    try:
+        yield
+    finally:
+        _state.use_replica = previous
+
+
+def reset_replica_reads():
+    _state.replica_read = False
+
+
+def replica_was_read():
+    """Читал ли поток с реплики после ``reset_replica_reads``."""
+    return getattr(_state, "replica_read", False)
+
+
+class PrimaryReplicaRouter:
+    """Отправляет чтение из GET-представлений на реплики, запись на primary."""
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, "DATABASE_REPLICAS", ())
+        if (
+            not replicas
+            or not replica_reads_enabled()
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+        ):
+            return PRIMARY_DB
+        _state.replica_read = True
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, "DATABASE_REPLICAS", ())
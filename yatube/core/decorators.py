@@ -0,0 +1,25 @@
+from functools import wraps
+
+from django.conf import settings
+
+from .db_routers import use_replica
+
+SAFE_METHODS = ("GET", "HEAD")
+
+
+def is_pinned_to_primary(request):
+    return settings.REPLICA_PIN_COOKIE in request.COOKIES
+
+
+def read_from_replica(view):
+    """Выполняет безопасные запросы представления на репликах."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS or is_pinned_to_primary(
+            request
+        ):
+            return view(request, *args, **kwargs)
+        with use_replica():
+            return view(request, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,55 @@
+"""Персональные вставки в общий для всех пользователей HTML."""
+import re
+from itertools import chain, zip_longest
+
+from django.utils.safestring import mark_safe
+
+# Аргументы — числа и имена пользователей (буквы, цифры и ".@+-_").
+HOLE = re.compile(r"<!--hole:(\w+)((?::[\w.@+-]*)*)-->")
+MARKER = b"<!--hole:"
+
+_fillers = {}
+
+
+def register(name):
+    """Регистрирует ``filler(request, *args) -> str`` для меток ``name``."""
+    def decorator(filler):
+        _fillers[name] = filler
+        return filler
+
+    return decorator
+
+
+def hole(name, *args):
+    return mark_safe(
+        "".join([f"<!--hole:{name}", *(f":{arg}" for arg in args), "-->"])
+    )
+
+
+def split_holes(content, charset):
+    """Куски ``content`` вокруг меток и сами метки ``(имя, аргументы)``."""
+    pieces = HOLE.split(content.decode(charset))
+    parts = [piece.encode(charset) for piece in pieces[::3]]
+    holes = [
+        (name, args.split(":")[1:])
+        for name, args in zip(pieces[1::3], pieces[2::3])
+    ]
+    return parts, holes
+
+
+def hole_fills(request, holes, charset):
+    return [
+        _fillers[name](request, *args).encode(charset)
+        for name, args in holes
+    ]
+
+
+def join_holes(parts, fills):
+    return b"".join(
+        chain.from_iterable(zip_longest(parts, fills, fillvalue=b""))
+    )
+
+
+def fill_holes(request, content, charset):
+    parts, holes = split_holes(content, charset)
+    return join_holes(parts, hole_fills(request, holes, charset))
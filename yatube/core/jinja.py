@@ -0,0 +1,30 @@
+"""Окружение Jinja2 для шаблонов ленты (см. ``FEED_TEMPLATE_ENGINE``)."""
+from django.template.defaultfilters import date, truncatechars, urlencode
+from django.templatetags.static import static
+from django.urls import reverse
+from jinja2 import Environment
+
+from .fragments import hole
+from .templatetags.user_filters import addclass
+from .thumbnails import thumbnail
+
+
+def url(viewname, *args, **kwargs):
+    return reverse(viewname, args=args, kwargs=kwargs)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update(
+        url=url,
+        static=static,
+        thumbnail=thumbnail,
+        hole=hole,
+    )
+    env.filters.update(
+        date=date,
+        truncatechars=truncatechars,
+        urlencode=urlencode,
+        addclass=addclass,
+    )
+    return env
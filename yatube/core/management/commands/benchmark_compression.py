@@ -0,0 +1,66 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from core.compression import (
+    MAX_LEVELS, available_encodings, compress, compress_cached,
+    compressed_key
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает CPU на сжатие страниц с выигрышем в байтах "
+        "для разных кодировок и уровней"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths", nargs="*", default=["/"],
+            help="Страницы сайта, например / /profile/leo/ /posts/1/",
+        )
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def measure(self, func, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        return result, (time.perf_counter() - started) / repeat
+
+    def handle(self, *args, **options):
+        client = Client()
+        repeat = options["repeat"]
+        self.stdout.write(
+            f"{'страница':<24}{'кодировка':<10}{'уровень':>8}{'байт':>10}"
+            f"{'сжатие':>8}{'мс':>8}{'КБ/мс CPU':>11}"
+        )
+        for path in options["paths"]:
+            response = client.get(path, HTTP_ACCEPT_ENCODING="identity")
+            if response.status_code != 200:
+                raise CommandError(f"{path}: ответ {response.status_code}")
+            data = response.content
+            self.stdout.write(f"{path:<24}{'-':<10}{'-':>8}{len(data):>10}")
+            for encoding in available_encodings():
+                for level in range(1, MAX_LEVELS[encoding] + 1):
+                    compressed, seconds = self.measure(
+                        lambda: compress(data, encoding, level), repeat
+                    )
+                    saved = len(data) - len(compressed)
+                    self.stdout.write(
+                        f"{'':<24}{encoding:<10}{level:>8}"
+                        f"{len(compressed):>10}"
+                        f"{len(compressed) / len(data):>8.1%}"
+                        f"{seconds * 1000:>8.2f}"
+                        f"{saved / 1024 / (seconds * 1000):>11.1f}"
+                    )
+                compress_cached(data, encoding, 60)
+                _, seconds = self.measure(
+                    lambda: compress_cached(data, encoding, 60), repeat
+                )
+                self.stdout.write(
+                    f"{'':<24}{encoding:<10}{'кэш':>8}{'':>18}"
+                    f"{seconds * 1000:>8.3f}"
+                )
+                cache.delete(compressed_key(data, encoding))
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.snapshots import is_pending, publish
+
+
+class Command(BaseCommand):
+    help = "Публикует статические снимки страниц для анонимов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--if-pending",
+            action="store_true",
+            help="Только если есть неопубликованные изменения "
+            "(запускать по cron)",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.SNAPSHOT_ROOT:
+            raise CommandError("Снимки выключены: SNAPSHOT_ROOT пуст")
+        if options["if_pending"] and not is_pending():
+            self.stdout.write("Снимки актуальны")
+            return
+        self.stdout.write(f"Опубликовано снимков: {publish()}")
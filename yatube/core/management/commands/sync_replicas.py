@@ -0,0 +1,36 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = "Копирует primary SQLite в реплики через online backup API"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=256,
+            help="Сколько страниц копировать за один шаг backup",
+        )
+
+    def handle(self, *args, **options):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas:
+            raise CommandError("В DATABASE_REPLICAS нет ни одной реплики")
+
+        primary = settings.DATABASES["default"]["NAME"]
+        source = sqlite3.connect(primary)
+        try:
+            for alias in replicas:
+                connections[alias].close()
+                target = sqlite3.connect(settings.DATABASES[alias]["NAME"])
+                try:
+                    source.backup(target, pages=options["pages"])
+                finally:
+                    target.close()
+                self.stdout.write(f"{primary} -> {alias}")
+        finally:
+            source.close()
@@ -0,0 +1,229 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.cache import get_max_age, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .compression import (
+    SUFFIXES, accepted_encodings, choose_encoding, compress, compress_cached,
+    compressible, join_gzip, worth_it
+)
+from .decorators import SAFE_METHODS
+from .fragments import MARKER, hole_fills, join_holes, split_holes
+from .ratelimit import check, too_many_requests
+from .snapshots import snapshot_pages, snapshot_path
+
+
+class PrimaryPinMiddleware:
+    """После записи закрепляет чтение пользователя за primary."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+            )
+        return response
+
+
+class RateLimitMiddleware:
+    """Общий лимит ``RATE_LIMITS["write"]`` на все изменяющие запросы."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.RATE_LIMITS.get("write")
+        if rate and request.method not in SAFE_METHODS:
+            retry_after = check(request, "write", rate)
+            if retry_after:
+                return too_many_requests(request, retry_after)
+        return self.get_response(request)
+
+
+class FragmentMiddleware:
+    """Заполняет метки ``{% hole %}`` данными текущего пользователя."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            not response.streaming
+            and response.get("Content-Type", "").startswith("text/html")
+            and MARKER in response.content
+        ):
+            parts, holes = split_holes(response.content, response.charset)
+            # Вставки своё у каждого пользователя: CompressionMiddleware
+            # сжимает только их, а куски вокруг берёт из page_cache.
+            response.hole_fills = hole_fills(request, holes, response.charset)
+            response.content = join_holes(parts, response.hole_fills)
+            if response.has_header("Content-Length"):
+                response["Content-Length"] = str(len(response.content))
+        return response
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику из ``STATIC_ROOT``."""
+
+    IMMUTABLE = "public, max-age=31536000, immutable"
+    REVALIDATE = "public, max-age=0, must-revalidate"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (
+            settings.STATIC_ROOT
+            and request.method in ("GET", "HEAD")
+            and request.path_info.startswith(settings.STATIC_URL)
+        ):
+            name = request.path_info[len(settings.STATIC_URL):]
+            response = self.serve(request, name)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = staticfiles_storage.path(name)
+        except SuspiciousFileOperation:
+            return None
+        if not name or not os.path.isfile(path):
+            return None
+
+        immutable = name in staticfiles_storage.immutable_names
+        content_type, _ = mimetypes.guess_type(path)
+        return serve_file(
+            request,
+            path,
+            content_type or "application/octet-stream",
+            self.IMMUTABLE if immutable else self.REVALIDATE,
+            revalidate=not immutable,
+        )
+
+
+class SnapshotMiddleware:
+    """Отдаёт анонимам снимки страниц из ``SNAPSHOT_ROOT``."""
+
+    REVALIDATE = "public, max-age=0, must-revalidate"
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        path = self.snapshot(request)
+        if path is not None and os.path.isfile(path):
+            response = serve_file(
+                request, path, "text/html; charset=utf-8", self.REVALIDATE
+            )
+            patch_vary_headers(response, ("Cookie",))
+            return response
+        return self.get_response(request)
+
+    def snapshot(self, request):
+        if (
+            not settings.SNAPSHOT_ROOT
+            or request.method not in ("GET", "HEAD")
+            or settings.SESSION_COOKIE_NAME in request.COOKIES
+            or set(request.GET) - {"page"}
+        ):
+            return None
+        pages = snapshot_pages().get(request.path_info)
+        page = request.GET.get("page", "1")
+        if pages is None or not page.isdigit():
+            return None
+        if not 1 <= int(page) <= pages:
+            return None
+        return snapshot_path(request.path_info, int(page))
+
+
+def serve_file(request, path, content_type, cache_control, revalidate=True):
+    """``FileResponse`` с файлом или его ``.br``/``.gz`` копией."""
+    stat = os.stat(path)
+    if revalidate and not was_modified_since(
+        request.META.get("HTTP_IF_MODIFIED_SINCE"),
+        stat.st_mtime,
+        stat.st_size,
+    ):
+        return HttpResponseNotModified()
+
+    accepted = accepted_encodings(request)
+    encoding = None
+    for candidate, suffix in SUFFIXES.items():
+        if candidate in accepted and os.path.isfile(path + suffix):
+            encoding, path = candidate, path + suffix
+            break
+
+    response = FileResponse(open(path, "rb"), content_type=content_type)
+    if encoding:
+        response["Content-Encoding"] = encoding
+    response["Vary"] = "Accept-Encoding"
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Cache-Control"] = cache_control
+    return response
+
+
+class CompressionMiddleware:
+    """Сжимает HTML и другие текстовые ответы gzip или brotli."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not compressible(response):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request)
+        if encoding is None:
+            return response
+
+        data = response.content
+        length, variants = (
+            getattr(response, "compressed_variants", None) or (0, None)
+        )
+        segments = getattr(response, "gzip_segments", None)
+        fills = getattr(response, "hole_fills", None)
+        spliced = None
+        if (
+            segments is not None
+            and fills is not None
+            and "gzip" in accepted_encodings(request)
+        ):
+            spliced = join_gzip(segments, fills, data)
+        max_age = get_max_age(response)
+        if spliced is not None:
+            # brotli из кусков не склеить: страница с метками идёт gzip.
+            encoding, compressed = "gzip", spliced
+        elif variants is not None and length == len(data):
+            compressed = variants.get(encoding)
+            if compressed is None:
+                # Сжатие этой страницы не окупилось.
+                return response
+        elif max_age and fills is None:
+            compressed = compress_cached(data, encoding, max_age)
+        else:
+            compressed = compress(data, encoding)
+        if not worth_it(data, compressed):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
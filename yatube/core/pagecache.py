@@ -0,0 +1,172 @@
+"""Кэш страниц с тегами (surrogate keys) и точечной очисткой."""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import Signal
+from django.http import HttpResponse
+
+from .compression import (
+    available_encodings, compress, compressible, gzip_segments, worth_it
+)
+from .db_routers import replica_was_read, reset_replica_reads
+from .decorators import SAFE_METHODS, is_pinned_to_primary
+from .fragments import MARKER, split_holes
+
+# Отправляется с ``tags`` после очистки, например для PURGE во внешнем
+# HTTP-кэше по заголовку Surrogate-Key.
+tags_purged = Signal(providing_args=["tags"])
+
+EPOCH_KEY = "pagecache:epoch"
+PURGED_AT_KEY = "pagecache:purged_at"
+# Есть у каждой страницы: ``purge(ALL)`` устаревает весь кэш сразу.
+ALL = "all"
+
+
+def page_key(request):
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"pagecache:page:{digest}"
+
+
+def tag_key(tag):
+    # В слагах групп бывает кириллица, а memcached принимает только ASCII.
+    return f"pagecache:tag:{hashlib.md5(tag.encode()).hexdigest()}"
+
+
+def tag_page(request, *tags):
+    request.page_tags = getattr(request, "page_tags", ()) + tags
+
+
+def tag_versions(tags):
+    keys = {tag_key(tag): tag for tag in tags}
+    found = cache.get_many(list(keys))
+    for key, tag in keys.items():
+        if key not in found:
+            cache.add(key, 1, None)
+            found[key] = cache.get(key, 1)
+    return {keys[key]: version for key, version in found.items()}
+
+
+def is_fresh(versions):
+    current = cache.get_many([tag_key(tag) for tag in versions])
+    return all(
+        current.get(tag_key(tag)) == version
+        for tag, version in versions.items()
+    )
+
+
+def epoch():
+    return cache.get(EPOCH_KEY, 0)
+
+
+def purge(*tags):
+    cache.add(EPOCH_KEY, 0, None)
+    cache.incr(EPOCH_KEY)
+    cache.set(PURGED_AT_KEY, time.time(), None)
+    for tag in set(tags):
+        try:
+            cache.incr(tag_key(tag))
+        except ValueError:
+            # Версии нет — и страниц, которые бы на неё ссылались, тоже.
+            pass
+    tags_purged.send(sender=None, tags=tags)
+
+
+def purge_on_commit(*tags, using=None):
+    """Очистка для обработчиков сигналов моделей."""
+    # Страница, собранная до коммита, ещё видела старые данные.
+    purge(*tags)
+    transaction.on_commit(lambda: purge(*tags), using=using)
+
+
+def compressed_variants(response):
+    """``(длина, {кодировка: байты})`` для страницы без меток."""
+    content = response.content
+    if MARKER in content or not compressible(response):
+        return None
+    variants = {}
+    for encoding in available_encodings():
+        compressed = compress(content, encoding)
+        if worth_it(content, compressed):
+            variants[encoding] = compressed
+    return len(content), variants
+
+
+def compressed_parts(response):
+    """Сжатые куски страницы вокруг меток ``{% hole %}``."""
+    content = response.content
+    if MARKER not in content or not compressible(response):
+        return None
+    parts, _ = split_holes(content, response.charset)
+    return gzip_segments(parts)
+
+
+def replica_may_lag():
+    purged_at = cache.get(PURGED_AT_KEY, 0)
+    return time.time() - purged_at < settings.REPLICA_PIN_SECONDS
+
+
+def surrogate_keys(response, tags):
+    tags = set(tags) - {ALL}
+    if settings.PAGE_CACHE_SURROGATE_KEYS and tags:
+        response["Surrogate-Key"] = " ".join(sorted(tags))
+
+
+def page_cache(view):
+    """Кэширует публичную страницу на ``settings.PAGE_CACHE_TIMEOUT``."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        # Автор изменения должен увидеть его сразу, мимо кэша.
+        if request.method not in SAFE_METHODS or is_pinned_to_primary(
+            request
+        ):
+            return view(request, *args, **kwargs)
+
+        key = page_key(request)
+        entry = cache.get(key)
+        if entry is not None and is_fresh(entry["tags"]):
+            response = HttpResponse(
+                entry["content"], content_type=entry["content_type"]
+            )
+            response.compressed_variants = entry["compressed"]
+            response.gzip_segments = entry["segments"]
+            # Теги нужны и вызывающему коду, например снимкам.
+            tag_page(request, *(tag for tag in entry["tags"] if tag != ALL))
+            surrogate_keys(response, entry["tags"])
+            return response
+
+        started = epoch()
+        reset_replica_reads()
+        response = view(request, *args, **kwargs)
+        tags = getattr(request, "page_tags", ())
+        session = getattr(request, "session", None)
+        # Очистка во время рендеринга, чтение сессии или отстающей реплики —
+        # такую страницу нельзя отдавать всем.
+        if (
+            epoch() == started
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not (session is not None and session.accessed)
+            and not (replica_was_read() and replica_may_lag())
+        ):
+            response.compressed_variants = compressed_variants(response)
+            response.gzip_segments = compressed_parts(response)
+            cache.set(
+                key,
+                {
+                    "content": response.content,
+                    "content_type": response["Content-Type"],
+                    "compressed": response.compressed_variants,
+                    "segments": response.gzip_segments,
+                    "tags": tag_versions(tags + (ALL,)),
+                },
+                settings.PAGE_CACHE_TIMEOUT,
+            )
+        surrogate_keys(response, tags)
+        return response
+
+    return wrapper
@@ -0,0 +1,110 @@
+"""Token bucket (GCRA) на общем кэше: в ключе — TAT в микросекундах."""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.shortcuts import render
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+MICROSECONDS = 1_000_000
+UNSAFE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+# Кэши, у которых своя копия в каждом процессе.
+LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def parse_rate(rate):
+    """``"10/m"`` -> ``(ёмкость, микросекунд на токен)``."""
+    count, period = rate.split("/")
+    count = int(count)
+    return count, PERIODS[period] * MICROSECONDS // count
+
+
+def client_ip(request):
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def bucket_keys(request, scope):
+    keys = [f"rl:{scope}:ip:{client_ip(request)}"]
+    if request.user.is_authenticated:
+        keys.append(f"rl:{scope}:user:{request.user.pk}")
+    return keys
+
+
+def consume(key, rate):
+    """Забирает токен; возвращает 0 или сколько секунд ждать."""
+    capacity, emission = parse_rate(rate)
+    cache = caches[settings.RATE_LIMIT_CACHE]
+    now = int(time.time() * MICROSECONDS)
+    timeout = capacity * emission // MICROSECONDS + 1
+
+    cache.add(key, now, timeout)
+    try:
+        tat = cache.incr(key, emission)
+    except ValueError:
+        # Ключ истёк между add и incr: корзина полна.
+        cache.set(key, now + emission, timeout)
+        return 0
+    if tat - emission < now:
+        # Корзина простаивала: догоняем TAT до текущего времени.
+        tat = cache.incr(key, now - (tat - emission))
+    cache.touch(key, timeout)
+
+    excess = tat - now - capacity * emission
+    if excess <= 0:
+        return 0
+    # Отказ не должен занимать место в корзине.
+    cache.decr(key, emission)
+    return excess // MICROSECONDS + 1
+
+
+def check(request, scope, rate):
+    retry_after = 0
+    for key in bucket_keys(request, scope):
+        retry_after = max(retry_after, consume(key, rate))
+    return retry_after
+
+
+def too_many_requests(request, retry_after):
+    response = render(request, "core/429.html", status=429)
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+def rate_limit(scope, methods=UNSAFE_METHODS):
+    """Ограничивает запросы ``methods`` лимитом ``RATE_LIMITS[scope]``."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rate = settings.RATE_LIMITS.get(scope)
+            retry_after = (
+                rate
+                and request.method in methods
+                and check(request, scope, rate)
+            )
+            if retry_after:
+                return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES[settings.RATE_LIMIT_CACHE]["BACKEND"]
+    if not settings.RATE_LIMITS or backend not in LOCAL_CACHES:
+        return []
+    return [
+        checks.Warning(
+            f"RATE_LIMIT_CACHE ({settings.RATE_LIMIT_CACHE}) хранит корзины "
+            "в памяти процесса: каждый воркер считает лимиты отдельно.",
+            hint="Укажите общий кэш, например memcached.",
+            id="core.W001",
+        )
+    ]
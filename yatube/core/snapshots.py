@@ -0,0 +1,184 @@
+"""Статические снимки публичных страниц для анонимных посетителей."""
+import atexit
+import logging
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import resolve, reverse
+
+from .fragments import MARKER, fill_holes
+from .pagecache import ALL
+from .storage import compress_variants
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = "snapshots:pending"
+PENDING_FILE = ".pending"
+TAGS_FILE = ".tags"
+VARIANTS = (".gz", ".br")
+
+_timer = None
+
+
+def snapshot_path(path, page):
+    name = path.strip("/").replace("/", "_") or "index"
+    return os.path.join(settings.SNAPSHOT_ROOT, name, f"{page}.html")
+
+
+def root_file(name):
+    return os.path.join(settings.SNAPSHOT_ROOT, name)
+
+
+def published_tags():
+    """Теги опубликованных снимков; ``None``, если публикаций не было."""
+    try:
+        with open(root_file(TAGS_FILE)) as file:
+            return set(file.read().split())
+    except FileNotFoundError:
+        return None
+
+
+def is_pending():
+    return os.path.exists(root_file(PENDING_FILE))
+
+
+def mark_pending():
+    # Отметка на диске, а не в кэше процесса: её видят все процессы и cron.
+    os.makedirs(settings.SNAPSHOT_ROOT, exist_ok=True)
+    with open(root_file(PENDING_FILE), "w"):
+        pass
+
+
+def snapshot_pages():
+    """``{путь: число страниц}`` для ``SNAPSHOT_PAGES``."""
+    return {
+        reverse(name): pages
+        for name, pages in settings.SNAPSHOT_PAGES.items()
+    }
+
+
+def render_page(path, page):
+    """HTML страницы для анонима и её теги; ``None``, если не годится."""
+    match = resolve(path)
+    request = HttpRequest()
+    request.method = "GET"
+    request.path = request.path_info = path
+    request.GET = QueryDict(mutable=True)
+    if page > 1:
+        request.GET["page"] = str(page)
+    request.META["QUERY_STRING"] = request.GET.urlencode()
+    request.user = AnonymousUser()
+    request.resolver_match = match
+
+    response = match.func(request, *match.args, **match.kwargs)
+    if response.status_code != 200 or response.streaming:
+        return None, ()
+    content = response.content
+    if MARKER in content:
+        content = fill_holes(request, content, response.charset)
+    if request.META.get("CSRF_COOKIE_USED"):
+        # Токен CSRF в общем файле не подошёл бы никому.
+        return None, ()
+    return content, getattr(request, "page_tags", ())
+
+
+def write_atomic(path, data):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def remove(path):
+    for name in (path, *(path + suffix for suffix in VARIANTS)):
+        if os.path.exists(name):
+            os.unlink(name)
+
+
+def write_snapshot(path, content):
+    # Сначала сжатые копии: HTML, который их выбирает, появляется
+    # последним.
+    variants = compress_variants(content)
+    for suffix in VARIANTS:
+        if suffix in variants:
+            write_atomic(path + suffix, variants[suffix])
+        elif os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+    write_atomic(path, content)
+
+
+def publish():
+    """Перерисовывает все снимки; возвращает число записанных."""
+    if not settings.SNAPSHOT_ROOT:
+        return 0
+    # Изменения, пришедшие во время рендеринга, запланируют новый.
+    cache.delete(PENDING_KEY)
+    if is_pending():
+        os.unlink(root_file(PENDING_FILE))
+    tags = set()
+    published = 0
+    for path, pages in snapshot_pages().items():
+        for page in range(1, pages + 1):
+            content, page_tags = render_page(path, page)
+            target = snapshot_path(path, page)
+            if content is None:
+                remove(target)
+                continue
+            write_snapshot(target, content)
+            tags.update(page_tags)
+            published += 1
+    write_atomic(root_file(TAGS_FILE), "\n".join(sorted(tags)).encode())
+    return published
+
+
+def run():
+    try:
+        publish()
+    except Exception:
+        logger.exception("Не удалось опубликовать снимки страниц")
+    finally:
+        connections.close_all()
+
+
+def schedule():
+    """Публикует снимки с задержкой, если ещё не запланировано."""
+    global _timer
+    mark_pending()
+    delay = settings.SNAPSHOT_DEBOUNCE_SECONDS
+    # Ключ живёт дольше таймера: если процесс умрёт, не дождавшись его,
+    # публикацию со временем запланирует другой.
+    if cache.add(PENDING_KEY, True, delay + 60):
+        _timer = threading.Timer(delay, run)
+        _timer.daemon = True
+        _timer.start()
+
+
+def tags_changed(sender, tags, **kwargs):
+    if not settings.SNAPSHOT_ROOT:
+        return
+    published = published_tags()
+    if published is None or ALL in tags or published.intersection(tags):
+        schedule()
+
+
+def _publish_at_exit():
+    # Команда, очистившая теги, не должна уносить публикацию с собой.
+    if _timer is not None and _timer.is_alive():
+        _timer.cancel()
+        run()
+
+
+atexit.register(_publish_at_exit)
@@ -0,0 +1,105 @@
+"""Хранилища файлов с хэшем содержимого в имени."""
+import hashlib
+import os
+import posixpath
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from .compression import (
+    MAX_LEVELS, SUFFIXES, available_encodings, compress, worth_it
+)
+
+COMPRESSIBLE = (
+    ".css", ".js", ".map", ".svg", ".ico", ".json", ".txt", ".xml",
+    ".html", ".ttf", ".otf", ".eot",
+)
+# Мелкие файлы сжатие почти не уменьшает.
+MIN_COMPRESS_SIZE: int = 256
+
+
+def compress_variants(data):
+    """``{".gz": ..., ".br": ...}`` — только те, что заметно меньше."""
+    variants = {}
+    for encoding in available_encodings():
+        compressed = compress(data, encoding, MAX_LEVELS[encoding])
+        if worth_it(data, compressed):
+            variants[SUFFIXES[encoding]] = compressed
+    return variants
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """``ManifestStaticFilesStorage`` с ``.gz``/``.br`` копиями."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable_names = frozenset(self.hashed_files.values())
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if isinstance(hashed_name, str):
+                names.update((name, hashed_name))
+            yield name, hashed_name, processed
+        if not dry_run:
+            for name in sorted(names):
+                self.compress(name)
+
+    def save_manifest(self):
+        super().save_manifest()
+        self.immutable_names = frozenset(self.hashed_files.values())
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE):
+            return
+        with self.open(name) as original:
+            data = original.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, compressed in compress_variants(data).items():
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    if hasattr(content, "seek"):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, "seek"):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Имя файла — хэш содержимого; повторная загрузка ничего не пишет."""
+
+    def hashed_name(self, name, digest):
+        directory = posixpath.dirname(name)
+        extension = posixpath.splitext(name)[1].lower()
+        return posixpath.join(directory, digest[:2], digest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.hashed_name(name, content_hash(content))
+        if self.exists(name):
+            # Свежее время изменения: сборщик мусора не тронет файл, пока
+            # не закоммичен пост, который на него ссылается.
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
@@ -0,0 +1,10 @@
+from django import template
+
+from ..fragments import hole as make_hole
+
+register = template.Library()
+
+
+@register.simple_tag
+def hole(name, *args):
+    return make_hole(name, *args)
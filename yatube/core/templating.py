@@ -0,0 +1,48 @@
+"""Прогрев кэша шаблонов."""
+import os
+
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.jinja2 import Jinja2
+from django.template.loaders.cached import Loader as CachedLoader
+
+
+def template_names(directory):
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if filename.endswith(".html"):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, directory).replace(os.sep, "/")
+
+
+def uses_cached_loader(engine):
+    return any(
+        isinstance(loader, CachedLoader)
+        for loader in engine.engine.template_loaders
+    )
+
+
+def reset_template_cache():
+    for engine in engines.all():
+        if isinstance(engine, Jinja2) and engine.env.cache is not None:
+            engine.env.cache.clear()
+        if isinstance(engine, DjangoTemplates):
+            for loader in engine.engine.template_loaders:
+                if isinstance(loader, CachedLoader):
+                    loader.reset()
+
+
+def warm_templates():
+    """Компилирует все шаблоны из ``DIRS``; возвращает их число."""
+    warmed = 0
+    for engine in engines.all():
+        if isinstance(engine, DjangoTemplates):
+            if not uses_cached_loader(engine):
+                continue
+        elif not isinstance(engine, Jinja2):
+            continue
+        for directory in engine.template_dirs:
+            for name in template_names(directory):
+                engine.get_template(name)
+                warmed += 1
+    return warmed
@@ -0,0 +1,128 @@
+import gzip
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils.cache import patch_response_headers
+
+from ..compression import compressed_key
+from ..fragments import register
+from ..middleware import CompressionMiddleware, FragmentMiddleware
+from ..pagecache import page_cache, page_key
+
+PAGE = "<p>Лента постов</p>\n" * 200
+
+
+@register("reader")
+def reader(request, greeting):
+    return f"{greeting}, {request.META.get('HTTP_X_NAME', 'гость')}"
+
+
+@override_settings(COMPRESS_MIN_SIZE=500)
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def run_middleware(self, response, encoding="gzip, deflate"):
+        request = self.factory.get("/", HTTP_ACCEPT_ENCODING=encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_html_is_gzipped(self):
+        response = self.run_middleware(HttpResponse(PAGE))
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(
+            int(response["Content-Length"]), len(response.content)
+        )
+        self.assertEqual(gzip.decompress(response.content).decode(), PAGE)
+
+    def test_client_without_gzip_gets_plain_body(self):
+        for encoding in ("", "identity", "gzip;q=0"):
+            with self.subTest(encoding=encoding):
+                response = self.run_middleware(HttpResponse(PAGE), encoding)
+
+                self.assertFalse(response.has_header("Content-Encoding"))
+                self.assertEqual(response.content.decode(), PAGE)
+
+    def test_small_and_unlisted_responses_are_left_alone(self):
+        small = self.run_middleware(HttpResponse("<p>Пусто</p>"))
+        binary = self.run_middleware(
+            HttpResponse(b"\0" * 1000, content_type="image/png")
+        )
+        json = self.run_middleware(JsonResponse({"text": PAGE}))
+
+        self.assertFalse(small.has_header("Content-Encoding"))
+        self.assertFalse(binary.has_header("Content-Encoding"))
+        self.assertEqual(json["Content-Encoding"], "gzip")
+
+    def test_cacheable_page_is_compressed_once(self):
+        response = HttpResponse(PAGE)
+        patch_response_headers(response, cache_timeout=20)
+        key = compressed_key(PAGE.encode(), "gzip")
+        self.assertIsNone(cache.get(key))
+
+        compressed = self.run_middleware(response).content
+
+        self.assertEqual(cache.get(key), compressed)
+
+    def test_page_with_filled_holes_is_not_stored(self):
+        response = HttpResponse(PAGE)
+        patch_response_headers(response, cache_timeout=20)
+        response.hole_fills = []
+
+        self.run_middleware(response)
+
+        self.assertIsNone(cache.get(compressed_key(PAGE.encode(), "gzip")))
+
+    def test_uncacheable_page_is_not_stored(self):
+        self.run_middleware(HttpResponse(PAGE))
+
+        self.assertIsNone(cache.get(compressed_key(PAGE.encode(), "gzip")))
+
+    def test_page_cache_stores_compressed_copies_without_holes(self):
+        for page, stored in ((PAGE, True), (PAGE + "<!--hole:x-->", False)):
+            with self.subTest(stored=stored):
+                request = self.factory.get(
+                    f"/{len(page)}/", HTTP_ACCEPT_ENCODING="gzip"
+                )
+                view = page_cache(lambda request: HttpResponse(page))
+                view(request)
+                hit = view(request)
+                entry = cache.get(page_key(request))
+
+                self.assertEqual(hit.compressed_variants, entry["compressed"])
+                if stored:
+                    length, variants = entry["compressed"]
+                    self.assertEqual(
+                        gzip.decompress(variants["gzip"]).decode(), page
+                    )
+                    hit.compressed_variants = (length, {"gzip": b"stored"})
+                    response = CompressionMiddleware(lambda r: hit)(request)
+                    self.assertEqual(response.content, b"stored")
+                else:
+                    self.assertIsNone(entry["compressed"])
+
+    def test_cached_page_with_holes_compresses_only_fills(self):
+        page = PAGE + "<!--hole:reader:Привет-->" + PAGE
+        view = page_cache(lambda request: HttpResponse(page))
+        stack = CompressionMiddleware(FragmentMiddleware(view))
+        stack(self.factory.get("/", HTTP_ACCEPT_ENCODING="br, gzip"))
+
+        with mock.patch(
+            "core.middleware.compress", side_effect=AssertionError
+        ):
+            for name in ("Аня", "Боря"):
+                response = stack(
+                    self.factory.get(
+                        "/", HTTP_ACCEPT_ENCODING="br, gzip", HTTP_X_NAME=name
+                    )
+                )
+
+                self.assertEqual(response["Content-Encoding"], "gzip")
+                self.assertEqual(
+                    gzip.decompress(response.content).decode(),
+                    PAGE + f"Привет, {name}" + PAGE,
+                )
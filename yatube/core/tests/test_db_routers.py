@@ -0,0 +1,63 @@
+from django.contrib.sessions.models import Session
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..db_routers import (
+    PrimaryReplicaRouter, replica_reads_enabled, use_replica
+)
+from ..decorators import read_from_replica
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class PrimaryReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_go_to_primary_outside_replica_views(self):
+        self.assertEqual(self.router.db_for_read(Post), "default")
+
+    def test_reads_go_to_replica_inside_replica_views(self):
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(Post), "replica")
+            self.assertEqual(self.router.db_for_read(Session), "default")
+            self.assertEqual(self.router.db_for_write(Post), "default")
+
+    def test_migrations_skip_replicas(self):
+        self.assertFalse(self.router.allow_migrate("replica", "posts"))
+        self.assertTrue(self.router.allow_migrate("default", "posts"))
+
+
+class ReadYourWritesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="writer")
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ReadYourWritesTests.user)
+
+    def test_write_pins_reads_to_primary(self):
+        response = self.authorized_client.post(
+            reverse("posts:new_post"), data={"text": "Новый пост"}
+        )
+
+        self.assertIn("pin_primary", response.cookies)
+
+    def test_view_reads_from_replica_unless_pinned(self):
+        seen = []
+
+        @read_from_replica
+        def view(request):
+            seen.append(replica_reads_enabled())
+
+        view(self.factory.get("/"))
+        pinned_request = self.factory.get("/")
+        pinned_request.COOKIES["pin_primary"] = "1"
+        view(pinned_request)
+        view(self.factory.post("/"))
+
+        self.assertEqual(seen, [True, False, False])
@@ -0,0 +1,110 @@
+from django.contrib.sessions.backends.base import SessionBase
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from posts.models import Post
+
+from ..db_routers import PrimaryReplicaRouter, use_replica
+from ..pagecache import page_cache, purge, tag_page, tags_purged
+
+
+class PageCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.renders = 0
+
+    def view(self, request, tags=("post:1",)):
+        self.renders += 1
+        tag_page(request, *tags)
+        return HttpResponse(f"render {self.renders}")
+
+    def get(self, view=None, path="/posts/1/"):
+        return page_cache(view or self.view)(self.factory.get(path))
+
+    def test_page_is_served_from_cache(self):
+        self.get()
+        response = self.get()
+
+        self.assertEqual(self.renders, 1)
+        self.assertEqual(response.content, b"render 1")
+
+    def test_purge_drops_only_tagged_pages(self):
+        self.get()
+        page_cache(lambda r: self.view(r, ("post:2",)))(
+            self.factory.get("/posts/2/")
+        )
+
+        purge("post:1")
+        self.get()
+        page_cache(lambda r: self.view(r, ("post:2",)))(
+            self.factory.get("/posts/2/")
+        )
+
+        self.assertEqual(self.renders, 3)
+
+    def test_page_rendered_during_purge_is_not_stored(self):
+        def view(request):
+            purge("post:1")
+            return self.view(request)
+
+        self.get(view)
+        self.get()
+
+        self.assertEqual(self.renders, 2)
+
+    def test_page_that_read_session_is_not_stored(self):
+        def view(request):
+            request.session = SessionBase()
+            request.session.get("_auth_user_id")
+            return self.view(request)
+
+        self.get(view)
+        self.get(view)
+
+        self.assertEqual(self.renders, 2)
+
+    def test_request_pinned_to_primary_bypasses_cache(self):
+        self.get()
+        request = self.factory.get("/posts/1/")
+        request.COOKIES[settings.REPLICA_PIN_COOKIE] = "1"
+
+        response = page_cache(self.view)(request)
+
+        self.assertEqual(response.content, b"render 2")
+
+    @override_settings(DATABASE_REPLICAS=["replica"])
+    def test_replica_page_is_not_stored_right_after_purge(self):
+        def view(request):
+            with use_replica():
+                PrimaryReplicaRouter().db_for_read(Post)
+            return self.view(request)
+
+        purge("post:1")
+        self.get(view)
+        self.get(view)
+
+        self.assertEqual(self.renders, 2)
+
+    def test_purge_sends_signal(self):
+        received = []
+
+        def receiver(sender, tags, **kwargs):
+            received.extend(tags)
+
+        tags_purged.connect(receiver)
+        self.addCleanup(tags_purged.disconnect, receiver)
+        purge("group:Тестовая")
+
+        self.assertEqual(received, ["group:Тестовая"])
+
+    @override_settings(PAGE_CACHE_SURROGATE_KEYS=True)
+    def test_surrogate_key_header(self):
+        view = page_cache(lambda r: self.view(r, ("post:1", "author:2")))
+
+        for attempt in ("miss", "hit"):
+            with self.subTest(attempt=attempt):
+                response = view(self.factory.get("/posts/1/"))
+                self.assertEqual(response["Surrogate-Key"], "author:2 post:1")
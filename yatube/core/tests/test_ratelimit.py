@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache, caches
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import User
+
+from ..ratelimit import check, parse_rate
+
+
+class TokenBucketTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def make_request(self, user=None, ip="10.0.0.1"):
+        request = self.factory.post("/", REMOTE_ADDR=ip)
+        request.user = user or AnonymousUser()
+        return request
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate("10/s"), (10, 100_000))
+        self.assertEqual(parse_rate("2/m"), (2, 30_000_000))
+
+    def test_bucket_allows_burst_then_rejects(self):
+        results = [
+            check(self.make_request(), "test", "3/m") for _ in range(4)
+        ]
+
+        self.assertEqual(results[:3], [0, 0, 0])
+        self.assertGreater(results[3], 0)
+
+    def test_buckets_are_per_ip(self):
+        for _ in range(3):
+            check(self.make_request(ip="10.0.0.1"), "test", "3/m")
+
+        self.assertEqual(
+            check(self.make_request(ip="10.0.0.2"), "test", "3/m"), 0
+        )
+
+    def test_fast_path_has_no_read_modify_write(self):
+        request = self.make_request()
+        check(request, "bench", "100/h")
+        shared = caches[settings.RATE_LIMIT_CACHE]
+        with mock.patch.object(
+            shared, "get", side_effect=AssertionError
+        ), mock.patch.object(
+            shared, "set", side_effect=AssertionError
+        ), mock.patch.object(shared, "incr", wraps=shared.incr) as incr:
+            check(request, "bench", "100/h")
+
+        self.assertEqual(incr.call_count, 1)
+
+
+@override_settings(RATE_LIMITS={"follow": "1/h"})
+class RateLimitedViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="follower")
+        cls.author = User.objects.create_user(username="author")
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(RateLimitedViewTests.user)
+
+    def test_exceeding_limit_returns_429_with_retry_after(self):
+        url = reverse("posts:profile_follow", kwargs={"username": "author"})
+        first = self.authorized_client.get(url)
+        second = self.authorized_client.get(url)
+
+        self.assertEqual(first.status_code, 302)
+        self.assertEqual(second.status_code, 429)
+        self.assertGreater(int(second["Retry-After"]), 0)
+
+    @override_settings(RATE_LIMITS={"post_create": "1/h"})
+    def test_opening_form_does_not_spend_tokens(self):
+        url = reverse("posts:new_post")
+        for _ in range(3):
+            self.assertEqual(self.authorized_client.get(url).status_code, 200)
+
+        self.authorized_client.post(url, {"text": "Первый"})
+        response = self.authorized_client.post(url, {"text": "Второй"})
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(RATE_LIMITS={"write": "1/h"})
+    def test_global_limit_page_has_filled_header(self):
+        url = reverse("posts:profile_follow", kwargs={"username": "author"})
+        self.authorized_client.post(url)
+        response = self.authorized_client.post(url)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertNotContains(response, "<!--hole:", status_code=429)
+        self.assertContains(response, "Выйти", status_code=429)
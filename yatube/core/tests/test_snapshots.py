@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from core import snapshots
+from core.pagecache import purge
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SnapshotTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="Snapper")
+        Post.objects.create(author=cls.user, text="Снимок главной")
+
+    def setUp(self):
+        cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.settings = override_settings(
+            SNAPSHOT_ROOT=self.root, SNAPSHOT_DEBOUNCE_SECONDS=3600
+        )
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def test_publish_writes_first_index_pages(self):
+        self.assertEqual(snapshots.publish(), 3)
+
+        with open(os.path.join(self.root, "index", "1.html")) as page:
+            html = page.read()
+        self.assertIn("Снимок главной", html)
+        self.assertIn("Войти", html)
+        self.assertNotIn("<!--hole:", html)
+
+    def test_anonymous_visitor_gets_snapshot(self):
+        snapshots.publish()
+        for page in ("1", "2"):
+            path = os.path.join(self.root, "index", f"{page}.html")
+            with open(path, "w") as snapshot:
+                snapshot.write(f"снимок {page}")
+
+        first = Client().get("/")
+        second = Client().get("/?page=2")
+
+        self.assertEqual(
+            b"".join(first.streaming_content), "снимок 1".encode()
+        )
+        self.assertEqual(
+            b"".join(second.streaming_content), "снимок 2".encode()
+        )
+        self.assertIn("Cookie", first["Vary"])
+
+    def test_logged_in_user_gets_live_page(self):
+        snapshots.publish()
+        with open(os.path.join(self.root, "index", "1.html"), "w") as page:
+            page.write("снимок")
+        client = Client()
+        client.force_login(self.user)
+
+        response = client.get("/")
+
+        self.assertContains(response, "Снимок главной")
+        self.assertEqual(Client().get("/?page=4").status_code, 200)
+        self.assertFalse(Client().get("/?page=4").streaming)
+
+    def test_publish_of_cached_page_keeps_its_tags(self):
+        for path, pages in snapshots.snapshot_pages().items():
+            for page in range(1, pages + 1):
+                snapshots.render_page(path, page)
+        snapshots.publish()
+
+        self.assertIn("feed:index", snapshots.published_tags())
+        purge("feed:index")
+        snapshots._timer.cancel()
+        self.assertTrue(snapshots.is_pending())
+
+    def test_purge_of_snapshot_tag_schedules_one_publish(self):
+        snapshots.publish()
+
+        purge("post:1")
+        self.assertIsNone(cache.get(snapshots.PENDING_KEY))
+
+        purge("feed:index")
+        timer = snapshots._timer
+        purge("feed:index")
+        timer.cancel()
+
+        self.assertTrue(cache.get(snapshots.PENDING_KEY))
+        self.assertIs(snapshots._timer, timer)
+
+    def test_cron_publishes_changes_left_by_another_process(self):
+        snapshots.publish()
+        out = StringIO()
+        call_command("publish_snapshots", "--if-pending", stdout=out)
+        self.assertIn("Снимки актуальны", out.getvalue())
+
+        purge("feed:index")
+        snapshots._timer.cancel()
+        self.assertTrue(snapshots.is_pending())
+        call_command("publish_snapshots", "--if-pending", stdout=out)
+
+        self.assertIn("Опубликовано снимков: 3", out.getvalue())
+        self.assertFalse(snapshots.is_pending())
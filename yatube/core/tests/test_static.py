@@ -0,0 +1,83 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+CSS = "body { color: #333; }\n" * 100
+
+
+class StaticFilesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, "css"))
+        with open(os.path.join(cls.source, "css", "main.css"), "w") as css:
+            css.write(CSS)
+        cls.settings = override_settings(
+            STATICFILES_DIRS=[cls.source], STATIC_ROOT=cls.root
+        )
+        cls.settings.enable()
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings.disable()
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.url = staticfiles_storage.url("css/main.css")
+
+    def test_url_is_hashed_and_precompressed(self):
+        name = self.url[len("/static/"):]
+
+        self.assertRegex(name, r"^css/main\.[0-9a-f]{12}\.css$")
+        with open(os.path.join(self.root, name + ".gz"), "rb") as packed:
+            self.assertEqual(gzip.decompress(packed.read()).decode(), CSS)
+
+    def test_gzip_variant_by_accept_encoding(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        body = b"".join(response.streaming_content)
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(body).decode(), CSS)
+
+    def test_plain_variant_without_accept_encoding(self):
+        response = self.client.get(self.url)
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(b"".join(response.streaming_content).decode(), CSS)
+
+    def test_hashed_names_are_immutable(self):
+        hashed = self.client.get(self.url)
+        plain = self.client.get("/static/css/main.css")
+
+        self.assertEqual(
+            hashed["Cache-Control"], "public, max-age=31536000, immutable"
+        )
+        self.assertIn("must-revalidate", plain["Cache-Control"])
+
+    def test_plain_name_revalidates(self):
+        last_modified = self.client.get("/static/css/main.css")[
+            "Last-Modified"
+        ]
+        response = self.client.get(
+            "/static/css/main.css", HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_file_falls_through(self):
+        response = self.client.get("/static/../manage.py")
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,36 @@
+import os
+
+from django.conf import settings
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from ..templating import template_names, warm_templates
+
+TEMPLATES_DIR = os.path.join(settings.BASE_DIR, "templates")
+
+
+def templates_setting(loaders):
+    return [{
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [TEMPLATES_DIR],
+        "OPTIONS": {"loaders": loaders},
+    }]
+
+
+class WarmTemplatesTests(SimpleTestCase):
+    @override_settings(TEMPLATES=templates_setting([
+        ("django.template.loaders.cached.Loader", settings.TEMPLATE_LOADERS),
+    ]))
+    def test_every_project_template_is_compiled(self):
+        names = list(template_names(TEMPLATES_DIR))
+
+        self.assertIn("posts/index.html", names)
+        self.assertEqual(warm_templates(), len(names))
+        loader = engines["django"].engine.template_loaders[0]
+        self.assertTrue(set(names) <= set(loader.get_template_cache))
+
+    @override_settings(
+        TEMPLATES=templates_setting(settings.TEMPLATE_LOADERS)
+    )
+    def test_nothing_to_warm_without_cached_loader(self):
+        self.assertEqual(warm_templates(), 0)
@@ -0,0 +1,86 @@
+"""Миниатюры sorl-thumbnail без чтения файлов при рендеринге."""
+import logging
+
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.helpers import toint
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.parsers import parse_geometry
+
+logger = logging.getLogger(__name__)
+
+
+def thumbnail(file, geometry, **options):
+    """Как ``{% thumbnail %}``: пустой файл или ошибка — ``None``."""
+    if not file:
+        return None
+    try:
+        image = get_thumbnail(file, geometry, **options)
+    except Exception:
+        if thumbnail_settings.THUMBNAIL_DEBUG:
+            raise
+        logger.exception("Не удалось построить миниатюру %s", file)
+        return None
+    # Исходник не прочитался: sorl отдаёт миниатюру без файла и размера.
+    return image if image.size else None
+
+
+def thumbnail_options(source, options):
+    """Параметры, из которых ``get_thumbnail`` строит имя миниатюры."""
+    backend = default.backend
+    options = dict(options)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault("format", backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(defaults, attr):
+            options.setdefault(key, value)
+    return options
+
+
+def thumbnail_size(size, geometry_string, options):
+    """Размер миниатюры по размеру исходника — как у движка sorl."""
+    width, height = map(float, size)
+    geometry = parse_geometry(geometry_string, width / height)
+    crop = options["crop"]
+    factors = (geometry[0] / width, geometry[1] / height)
+    factor = max(factors) if crop else min(factors)
+    if factor < 1 or options["upscale"]:
+        width, height = toint(width * factor), toint(height * factor)
+    if crop and crop != "noop":
+        width, height = min(width, geometry[0]), min(height, geometry[1])
+    if options["padding"]:
+        width, height = geometry
+    return [int(width), int(height)]
+
+
+def sized_thumbnail(file, size, geometry, **options):
+    """Миниатюра ``file`` с известным размером исходника ``size``."""
+    if not file:
+        return None
+    if not all(size or ()) or options.get("cropbox"):
+        return thumbnail(file, geometry, **options)
+    source = ImageFile(file)
+    resolved = thumbnail_options(source, options)
+    image = ImageFile(
+        default.backend._get_thumbnail_filename(source, geometry, resolved),
+        default.storage,
+    )
+    image.set_size(thumbnail_size(size, geometry, resolved))
+    return image
+
+
+def make_thumbnail(file, size, geometry, **options):
+    """Создаёт миниатюру; исходник открывается только для её построения."""
+    if not file:
+        return None
+    if all(size or ()):
+        # Записанный с размером исходник sorl не открывает, чтобы его
+        # измерить.
+        source = ImageFile(file)
+        source.set_size(size)
+        default.kvstore.get_or_set(source)
+    return thumbnail(file, geometry, **options)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Group, Post, Comment, Follow
+from .models import Group, Post, Comment, Follow, DeletionJob
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -9,6 +9,7 @@ class PostAdmin(admin.ModelAdmin):
         'pub_date',
         'author',
         'group',
+        'views',
     )
     list_editable = ('group',)
     search_fields = ('text',)
@@ -16,7 +17,24 @@ class PostAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'kind',
+        'object_id',
+        'mode',
+        'status',
+        'done',
+        'total',
+        'created',
+        'finished',
+    )
+    list_filter = ('status', 'kind')
+    readonly_fields = ('status', 'done', 'total', 'error', 'finished')
+
+
 admin.site.register(Group)
 admin.site.register(Comment)
 admin.site.register(Follow)
 admin.site.register(Post, PostAdmin)
+admin.site.register(DeletionJob, DeletionJobAdmin)
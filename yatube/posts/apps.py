@@ -3,3 +3,50 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = "posts"
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from django.db.models.signals import (
+            post_delete, post_init, post_save, pre_delete, pre_save
+        )
+
+        from . import fragments  # noqa: F401
+        from . import (
+            digests, follows, invalidation, media, rollups, sharding,
+            tagging, trending, unread
+        )
+        from .models import Comment, Follow, Group, Post
+
+        pre_delete.connect(
+            sharding.delete_author_rows, sender=get_user_model()
+        )
+        pre_delete.connect(sharding.detach_group_rows, sender=Group)
+        post_save.connect(follows.follow_saved, sender=Follow)
+        post_delete.connect(follows.follow_deleted, sender=Follow)
+        post_save.connect(trending.comment_saved, sender=Comment)
+        post_save.connect(trending.follow_saved, sender=Follow)
+        post_init.connect(rollups.post_loaded, sender=Post)
+        post_init.connect(media.post_loaded, sender=Post)
+        pre_save.connect(media.post_presave, sender=Post)
+        post_save.connect(media.post_saved, sender=Post)
+        post_delete.connect(media.post_deleted, sender=Post)
+        post_init.connect(tagging.post_loaded, sender=Post)
+        post_save.connect(tagging.post_saved, sender=Post)
+        post_delete.connect(tagging.post_deleted, sender=Post)
+        post_save.connect(digests.post_saved, sender=Post)
+        post_save.connect(unread.post_saved, sender=Post)
+        post_delete.connect(unread.post_deleted, sender=Post)
+        # До ``rollups.post_saved``: тот обновляет ``_loaded_group_id``.
+        post_save.connect(invalidation.post_saved, sender=Post)
+        post_delete.connect(invalidation.post_deleted, sender=Post)
+        post_save.connect(rollups.post_saved, sender=Post)
+        post_delete.connect(rollups.post_deleted, sender=Post)
+        post_save.connect(rollups.group_saved, sender=Group)
+        post_save.connect(invalidation.comment_changed, sender=Comment)
+        post_delete.connect(invalidation.comment_changed, sender=Comment)
+        post_init.connect(invalidation.group_loaded, sender=Group)
+        post_save.connect(invalidation.group_changed, sender=Group)
+        post_delete.connect(invalidation.group_changed, sender=Group)
+        pre_delete.connect(
+            invalidation.user_deleted, sender=get_user_model()
+        )
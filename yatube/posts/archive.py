@@ -0,0 +1,163 @@
+"""Архив старых постов в отдельной базе."""
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Case, Value, When
+
+from core.pagecache import purge
+
+from .invalidation import FEEDS, group_tags
+from .sharding import SHARD_ID_SPAN, SHARDED_MODELS, get_sequence, set_sequence
+
+# Последний диапазон, в который ещё влезает путь комментария из
+# ``PATH_DIGITS`` цифр.
+ARCHIVE_ID_FLOOR = 999 * SHARD_ID_SPAN
+MOVE_ATTEMPTS: int = 3
+
+
+def archive_alias():
+    return settings.POST_ARCHIVE
+
+
+def archive_aliases():
+    return [settings.POST_ARCHIVE] if settings.POST_ARCHIVE else []
+
+
+def archived_post(post_id):
+    from .models import Post
+
+    if not archive_alias():
+        return None
+    return Post.objects.using(archive_alias()).filter(pk=post_id).first()
+
+
+def with_archive(posts, author, *related):
+    """Горячие посты автора и за ними архивные, по ``pub_date``."""
+    from .models import Post
+    from .sharding import MergedPosts
+
+    if not archive_alias():
+        return posts
+    archived = (
+        Post.objects.using(archive_alias())
+        .filter(author=author)
+        .order_by("-pub_date", "-pk")
+        .prefetch_related(*related)
+    )
+    return MergedPosts([posts.order_by("-pub_date", "-pk"), archived])
+
+
+def prepare_archive():
+    from .models import Comment, Post
+
+    for model in (Post, Comment):
+        table = model._meta.db_table
+        if (get_sequence(archive_alias(), table) or 0) < ARCHIVE_ID_FLOOR:
+            set_sequence(archive_alias(), table, ARCHIVE_ID_FLOOR)
+
+
+def copy_rows(model, rows, alias):
+    """``bulk_create`` в ``alias`` с сохранением дат создания."""
+    dates = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, "auto_now_add", False)
+    ]
+    saved = {
+        field: [(row.pk, getattr(row, field.attname)) for row in rows]
+        for field in dates
+    }
+    queryset = model.objects.using(alias)
+    queryset.bulk_create(rows, ignore_conflicts=True)
+    queryset = queryset.filter(pk__in=[row.pk for row in rows])
+    for field, values in saved.items():
+        queryset.update(**{
+            field.attname: Case(
+                *[When(pk=pk, then=Value(value)) for pk, value in values],
+                output_field=field,
+            )
+        })
+
+
+def remove_rows(alias, ids, comments):
+    """Удаляет из ``alias`` перенесённые посты и комментарии."""
+    from .models import Comment, Post
+
+    with transaction.atomic(using=alias):
+        # Без Collector и сигналов: для сайта пост не удалён, а переехал.
+        Comment.objects.using(alias).filter(
+            pk__in=[comment.pk for comment in comments]
+        )._raw_delete(alias)
+        Post.objects.using(alias).filter(pk__in=ids)._raw_delete(alias)
+        # Внешние ключи в SQLite проверяются при коммите: проверяем сразу,
+        # чтобы откатить именно эту транзакцию.
+        connections[alias].check_constraints(
+            table_names=[Comment._meta.db_table]
+        )
+
+
+def archive_batch(alias, cutoff, size):
+    """Переносит до ``size`` постов старше ``cutoff`` из базы ``alias``."""
+    from .models import Comment, Post
+
+    posts = list(
+        Post.objects.using(alias)
+        .filter(pub_date__lt=cutoff)
+        .order_by("pk")[:size]
+    )
+    if not posts:
+        return []
+    ids = [post.pk for post in posts]
+    for _ in range(MOVE_ATTEMPTS):
+        comments = list(
+            Comment.objects.using(alias)
+            .filter(post_id__in=ids)
+            .order_by("pk")
+        )
+        with transaction.atomic(using=archive_alias()):
+            copy_rows(Post, posts, archive_alias())
+            if comments:
+                copy_rows(Comment, comments, archive_alias())
+        try:
+            remove_rows(alias, ids, comments)
+        except IntegrityError:
+            # Появился новый комментарий — докопируем его.
+            continue
+        # Ленты показывают только горячие посты.
+        purge(
+            *(f"post:{pk}" for pk in ids),
+            *{f"author:{post.author_id}" for post in posts},
+            *group_tags(*(post.group_id for post in posts)),
+            *FEEDS,
+        )
+        return ids
+    return []
+
+
+class ArchiveRouter:
+    """Посты и комментарии, прочитанные из архива, туда же и пишутся."""
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if (
+            not archive_alias()
+            or instance is None
+            or model._meta.label_lower not in SHARDED_MODELS
+        ):
+            return None
+        if instance._meta.label_lower == "posts.comment" and (
+            instance._state.adding and instance.post_id
+        ):
+            instance = instance.post
+        if (
+            instance._meta.label_lower in SHARDED_MODELS
+            and instance._state.db == archive_alias()
+        ):
+            return archive_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return self.db_for_read(model, **hints)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if not archive_alias() or db != archive_alias():
+            return None
+        return f"{app_label}.{model_name}" in SHARDED_MODELS
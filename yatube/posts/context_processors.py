@@ -0,0 +1,13 @@
+from django.utils.functional import SimpleLazyObject
+
+from .follows import followee_ids
+
+
+def followees(request):
+    """Подписки текущего пользователя; читаются из кэша, только если нужны."""
+    def load():
+        if not request.user.is_authenticated:
+            return frozenset()
+        return frozenset(followee_ids(request.user.pk))
+
+    return {"followees": SimpleLazyObject(load)}
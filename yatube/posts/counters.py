@@ -0,0 +1,159 @@
+"""Write-behind счётчики просмотров постов."""
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .archive import archive_aliases
+from .sharding import shard_for_author
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending = Counter()
+_timer = None
+
+
+def _key(post):
+    # Имя файла базы: просмотры из тестовой базы не попадут в рабочую.
+    alias = shard_for_author(post.author_id)
+    return alias, connections[alias].settings_dict["NAME"], post.pk
+
+
+def record_view(post):
+    key = _key(post)
+    with _lock:
+        _pending[key] += 1
+    schedule_flush()
+
+
+def schedule_flush():
+    global _timer
+    with _lock:
+        if _timer is None:
+            _timer = threading.Timer(
+                settings.VIEW_COUNTER_FLUSH_SECONDS, _flush_on_timer
+            )
+            _timer.daemon = True
+            _timer.start()
+
+
+def _flush_on_timer():
+    global _timer
+    with _lock:
+        _timer = None
+    try:
+        flush_views()
+    except Exception:
+        logger.exception("Не удалось сбросить просмотры в базу")
+    finally:
+        connections.close_all()
+    if _pending:
+        schedule_flush()
+
+
+def pending_views(post):
+    with _lock:
+        return _pending[_key(post)]
+
+
+def views_key(post_id):
+    return f"views:{post_id}"
+
+
+def stored_views(post):
+    """Сохранённое в базе число просмотров, где бы ни лежал пост."""
+    from .models import Post
+
+    views = cache.get(views_key(post.pk))
+    if views is not None:
+        return views
+    views = 0
+    for alias in (shard_for_author(post.author_id), *archive_aliases()):
+        found = (
+            Post.objects.using(alias)
+            .filter(pk=post.pk)
+            .values_list("views", flat=True)
+            .first()
+        )
+        if found is not None:
+            views = found
+            break
+    cache.set(
+        views_key(post.pk), views, settings.VIEW_COUNTER_FLUSH_SECONDS
+    )
+    return views
+
+
+def flush_views():
+    with _lock:
+        batch = dict(_pending)
+        _pending.clear()
+    done = set()
+    try:
+        _write(batch, done)
+    except Exception:
+        # Записанное не повторяем, остальное попробует следующий сброс.
+        with _lock:
+            for key, count in batch.items():
+                if key not in done:
+                    _pending[key] += count
+        raise
+    finally:
+        # Страницы постов не трогаем: число вставляет {% hole "views" %}.
+        cache.delete_many([views_key(pk) for _, _, pk in done])
+
+
+def _write(batch, done):
+    by_alias = {}
+    for key, count in batch.items():
+        alias, name, pk = key
+        if connections[alias].settings_dict["NAME"] != name:
+            done.add(key)
+            continue
+        by_alias.setdefault(alias, {})[pk] = (key, count)
+    for alias, counts in by_alias.items():
+        # Часть постов могла уехать в архив: им — в архиве.
+        for target in (alias, *archive_aliases()):
+            for pk in _add_views(target, counts):
+                done.add(counts.pop(pk)[0])
+            if not counts:
+                break
+        # Удалённые посты считать некуда.
+        done.update(key for key, _ in counts.values())
+
+
+def _add_views(alias, counts):
+    from .models import Post
+
+    with transaction.atomic(using=alias):
+        found = list(
+            Post.objects.using(alias)
+            .filter(pk__in=counts)
+            .values_list("pk", flat=True)
+        )
+        if found:
+            Post.objects.using(alias).filter(pk__in=found).update(
+                views=F("views") + Case(
+                    *[When(pk=pk, then=Value(counts[pk][1])) for pk in found],
+                    output_field=IntegerField(),
+                )
+            )
+    return found
+
+
+def _flush_at_exit():
+    try:
+        flush_views()
+    except Exception:
+        # Лучшее, что можно сделать при остановке: база уже может быть
+        # недоступна, а падать в atexit бессмысленно.
+        pass
+
+
+atexit.register(_flush_at_exit)
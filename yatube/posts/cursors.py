@@ -0,0 +1,39 @@
+"""Keyset-пагинация: следующая страница читается по индексу, без OFFSET."""
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Q
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(moment, pk):
+    return f"{(moment - EPOCH) // timedelta(microseconds=1)}-{pk}"
+
+
+def decode_cursor(value):
+    """Возвращает ``(moment, pk)`` или ``None`` для пустого/битого курсора."""
+    try:
+        micros, pk = (int(part) for part in value.split("-"))
+    except (AttributeError, ValueError):
+        return None
+    return EPOCH + timedelta(microseconds=micros), pk
+
+
+def keyset_page(queryset, field, cursor, size, descending=False):
+    """Отдаёт ``size`` строк после курсора и курсор следующей страницы."""
+    position = decode_cursor(cursor)
+    lookup = "lt" if descending else "gt"
+    if position is not None:
+        moment, pk = position
+        queryset = queryset.filter(
+            Q(**{f"{field}__{lookup}": moment})
+            | Q(**{field: moment, f"pk__{lookup}": pk})
+        )
+    prefix = "-" if descending else ""
+    queryset = queryset.order_by(f"{prefix}{field}", f"{prefix}pk")
+    rows = list(queryset[:size + 1])
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, field), last.pk)
@@ -0,0 +1,259 @@
+"""Фоновое удаление и обезличивание пользователей и групп."""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.pagecache import purge
+
+from . import rollups
+from .archive import archive_aliases
+from .follows import followees_key
+from .invalidation import FEEDS, group_tags
+from .media import release
+from .sharding import shard_aliases
+from .tagging import mentions_tag, unindex_posts
+from .trending import refresh
+from .unread import forget_authors
+
+CHUNK_SIZE: int = 500
+
+
+def schedule_user(user, anonymize=False):
+    from .models import DeletionJob
+
+    return DeletionJob.objects.create(
+        kind=DeletionJob.USER,
+        object_id=user.pk,
+        mode=DeletionJob.ANONYMIZE if anonymize else DeletionJob.DELETE,
+    )
+
+
+def schedule_group(group):
+    from .models import DeletionJob
+
+    return DeletionJob.objects.create(
+        kind=DeletionJob.GROUP, object_id=group.pk
+    )
+
+
+def raw_delete(queryset):
+    # Без Collector: каскады, которые нужны, удаляются явно.
+    return queryset._raw_delete(queryset.db)
+
+
+def in_chunks(queryset, step, size):
+    """Вызывает ``step(alias, ids)`` пачками, пока выборка не опустеет."""
+    queryset = queryset.order_by("pk").values_list("pk", flat=True)
+    while True:
+        ids = list(queryset[:size])
+        if not ids:
+            return
+        with transaction.atomic(using=queryset.db):
+            cleanup = step(queryset.db, ids)
+        if cleanup is not None:
+            cleanup()
+        yield len(ids)
+
+
+def delete_posts(alias, ids):
+    from .models import Comment, Post, TrendScore
+
+    posts = Post.objects.using(alias).filter(pk__in=ids)
+    images = list(posts.exclude(image="").values_list("image", flat=True))
+    authors = set(posts.values_list("author_id", flat=True))
+    raw_delete(Comment.objects.using(alias).filter(post_id__in=ids))
+    raw_delete(posts)
+    TrendScore.objects.filter(
+        kind=TrendScore.POST, object_id__in=ids
+    ).delete()
+    stale = unindex_posts(ids)
+
+    def cleanup():
+        for name in images:
+            release(name)
+        purge(*(f"post:{pk}" for pk in ids), *stale)
+        forget_authors(authors)
+
+    return cleanup
+
+
+def delete_threads(alias, ids):
+    """Удаляет комментарии вместе с ответами на них."""
+    from .models import Comment
+
+    comments = Comment.objects.using(alias).filter(pk__in=ids)
+    threads = Q(pk__in=ids)
+    post_ids = set()
+    for post_id, path in comments.values_list("post_id", "path"):
+        post_ids.add(post_id)
+        if path:
+            threads |= Q(post_id=post_id, path__startswith=path)
+    raw_delete(Comment.objects.using(alias).filter(threads))
+    return lambda: purge(*(f"post:{pk}" for pk in post_ids))
+
+
+def delete_follows(alias, ids):
+    from .models import Follow
+
+    follows = Follow.objects.using(alias).filter(pk__in=ids)
+    readers = set(follows.values_list("user_id", flat=True))
+    raw_delete(follows)
+    return lambda: cache.delete_many([followees_key(pk) for pk in readers])
+
+
+def delete_rows(alias, ids):
+    from .models import FollowSuggestion
+
+    raw_delete(FollowSuggestion.objects.using(alias).filter(pk__in=ids))
+
+
+def delete_mentions(alias, ids):
+    from .models import Mention
+
+    mentions = Mention.objects.using(alias).filter(pk__in=ids)
+    user_ids = set(mentions.values_list("user_id", flat=True))
+    raw_delete(mentions)
+    return lambda: purge(*(mentions_tag(pk) for pk in user_ids))
+
+
+def detach_posts(alias, ids):
+    from .models import Post
+
+    Post.objects.using(alias).filter(pk__in=ids).update(group=None)
+    return lambda: purge(*(f"post:{pk}" for pk in ids))
+
+
+def user_tasks(job):
+    from .models import (
+        Comment, DeletionJob, Follow, FollowSuggestion, Mention, Post
+    )
+
+    user_id = job.object_id
+    tasks = []
+    if job.mode == DeletionJob.DELETE:
+        for alias in shard_aliases() + archive_aliases():
+            tasks.append((
+                Post.objects.using(alias).filter(author_id=user_id),
+                delete_posts,
+            ))
+        for alias in shard_aliases() + archive_aliases():
+            tasks.append((
+                Comment.objects.using(alias).filter(author_id=user_id),
+                delete_threads,
+            ))
+    tasks.append((
+        Follow.objects.filter(Q(user_id=user_id) | Q(author_id=user_id)),
+        delete_follows,
+    ))
+    tasks.append((
+        FollowSuggestion.objects.filter(
+            Q(user_id=user_id) | Q(author_id=user_id)
+        ),
+        delete_rows,
+    ))
+    tasks.append((Mention.objects.filter(user_id=user_id), delete_mentions))
+    return tasks
+
+
+def finish_user(job):
+    from .models import DeletionJob, TrendScore
+
+    User = get_user_model()
+    user_id = job.object_id
+    cache.delete(followees_key(user_id))
+    if job.mode == DeletionJob.ANONYMIZE:
+        User.objects.filter(pk=user_id).update(
+            username=f"deleted-{user_id}",
+            first_name="",
+            last_name="",
+            email="",
+            password=make_password(None),
+            is_active=False,
+        )
+        group_ids = rollups.author_groups(user_id)
+    else:
+        group_ids = rollups.remove_author(user_id)
+        refresh(TrendScore.POST)
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None:
+            # Связанных строк уже нет: Collector только проверит это.
+            user.delete()
+    purge(
+        f"author:{user_id}", "feed:trending", *FEEDS, *group_tags(*group_ids)
+    )
+
+
+def group_tasks(job):
+    from .models import Post
+
+    return [
+        (
+            Post.objects.using(alias).filter(group_id=job.object_id),
+            detach_posts,
+        )
+        for alias in shard_aliases() + archive_aliases()
+    ]
+
+
+def finish_group(job):
+    from .models import Group, TrendScore
+
+    TrendScore.objects.filter(
+        kind=TrendScore.GROUP, object_id=job.object_id
+    ).delete()
+    refresh(TrendScore.GROUP)
+    group = Group.objects.filter(pk=job.object_id).first()
+    if group is not None:
+        # Сводки удалятся каскадом, а постов в группе уже нет.
+        group.delete()
+
+
+def claim(job):
+    """Берёт задание из очереди; ``False``, если его уже взял другой."""
+    from .models import DeletionJob
+
+    return bool(
+        DeletionJob.objects.filter(
+            pk=job.pk, status=DeletionJob.PENDING
+        ).update(status=DeletionJob.RUNNING)
+    )
+
+
+def run(job, chunk_size=CHUNK_SIZE, report=None):
+    """Выполняет задание; ``report(job)`` вызывается после каждой пачки."""
+    from .models import DeletionJob
+
+    if job.kind == DeletionJob.USER:
+        # Пока идёт удаление, пользователь не должен ничего добавить.
+        get_user_model().objects.filter(pk=job.object_id).update(
+            is_active=False
+        )
+        tasks, finish = user_tasks(job), finish_user
+    else:
+        tasks, finish = group_tasks(job), finish_group
+    job.status = DeletionJob.RUNNING
+    job.total = sum(queryset.count() for queryset, _ in tasks)
+    job.done = 0
+    job.error = ""
+    job.save(update_fields=["status", "total", "done", "error"])
+    try:
+        for queryset, step in tasks:
+            for count in in_chunks(queryset, step, chunk_size):
+                job.done = min(job.done + count, job.total)
+                DeletionJob.objects.filter(pk=job.pk).update(done=job.done)
+                if report is not None:
+                    report(job)
+        finish(job)
+    except Exception as error:
+        job.status = DeletionJob.FAILED
+        job.error = repr(error)
+        job.save(update_fields=["status", "error"])
+        raise
+    job.status = DeletionJob.DONE
+    job.done = job.total
+    job.finished = timezone.now()
+    job.save(update_fields=["status", "done", "finished"])
+    return job
@@ -0,0 +1,106 @@
+"""Письма подписчикам о новых постах — дайджестом, а не письмом на пост."""
+import time
+from itertools import chain, groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import render_to_string
+
+from .tagging import posts_by_ids
+
+BATCH_SIZE: int = 100
+# Сколько постов перечислять в одном письме; об остальных — число.
+DIGEST_POSTS: int = 20
+LOAD_CHUNK: int = 500
+
+
+def post_saved(sender, instance, created, **kwargs):
+    from .models import DigestEvent
+
+    if created:
+        DigestEvent.objects.create(
+            post_id=instance.pk, author_id=instance.author_id
+        )
+
+
+def posts_by_author(post_ids):
+    """``{author_id: [пост, ...]}`` для существующих постов из ``post_ids``."""
+    by_author = {}
+    for start in range(0, len(post_ids), LOAD_CHUNK):
+        chunk = post_ids[start:start + LOAD_CHUNK]
+        for post in posts_by_ids(chunk, "author"):
+            by_author.setdefault(post.author_id, []).append(post)
+    return by_author
+
+
+def recipients(author_ids):
+    """``((id, имя, email), [id авторов])`` по порядку читателей."""
+    from .models import Follow
+
+    follows = (
+        Follow.objects.filter(author_id__in=author_ids, user__is_active=True)
+        .exclude(user__email="")
+        .order_by("user_id")
+        .values_list("user_id", "user__username", "user__email", "author_id")
+        .iterator()
+    )
+    for reader, rows in groupby(follows, key=itemgetter(0, 1, 2)):
+        yield reader, [row[3] for row in rows]
+
+
+def digest_message(username, email, posts):
+    posts = sorted(
+        posts, key=lambda post: (post.pub_date, post.pk), reverse=True
+    )
+    context = {
+        "username": username,
+        "posts": posts[:DIGEST_POSTS],
+        "more": max(len(posts) - DIGEST_POSTS, 0),
+        "site_url": settings.SITE_URL,
+    }
+    return EmailMessage(
+        subject=f"Новые посты от ваших авторов: {len(posts)}",
+        body=render_to_string("posts/digest_email.txt", context),
+        to=[email],
+    )
+
+
+def send_digests(batch_size=BATCH_SIZE, connection=None):
+    """Рассылает дайджесты по накопленным событиям."""
+    from .models import DigestEvent
+
+    started = time.monotonic()
+    events = list(
+        DigestEvent.objects.order_by("pk").values_list("pk", "post_id")
+    )
+    stats = dict(events=len(events), recipients=0, emails=0, batches=0)
+    if events:
+        by_author = posts_by_author([post_id for _, post_id in events])
+        connection = connection or get_connection()
+        batch = []
+
+        def flush():
+            stats["emails"] += connection.send_messages(batch) or 0
+            stats["batches"] += 1
+            batch.clear()
+
+        readers = recipients(list(by_author))
+        with connection:
+            for (_, username, email), author_ids in readers:
+                posts = list(chain.from_iterable(
+                    by_author[author_id] for author_id in author_ids
+                ))
+                stats["recipients"] += 1
+                batch.append(digest_message(username, email, posts))
+                if len(batch) >= batch_size:
+                    flush()
+            if batch:
+                flush()
+        DigestEvent.objects.filter(pk__lte=events[-1][0]).delete()
+
+    stats["seconds"] = time.monotonic() - started
+    stats["per_second"] = (
+        stats["emails"] / stats["seconds"] if stats["seconds"] else 0
+    )
+    return stats
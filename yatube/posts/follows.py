@@ -0,0 +1,56 @@
+"""Кэш подписок: отсортированный массив id авторов на каждого читателя."""
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+from django.db import transaction
+
+FOLLOWEES_TIMEOUT = 24 * 60 * 60
+
+
+def followees_key(user_id):
+    return f"followees:{user_id}"
+
+
+def _load(user_id):
+    from .models import Follow
+
+    ids = array(
+        "q",
+        Follow.objects.filter(user_id=user_id)
+        .order_by("author_id")
+        .values_list("author_id", flat=True),
+    )
+    cache.set(followees_key(user_id), ids.tobytes(), FOLLOWEES_TIMEOUT)
+    return ids
+
+
+def followee_ids(user_id):
+    """Отсортированный ``array`` id авторов, на которых подписан читатель."""
+    data = cache.get(followees_key(user_id))
+    if data is None:
+        return _load(user_id)
+    ids = array("q")
+    ids.frombytes(data)
+    return ids
+
+
+def is_following(user_id, author_id):
+    ids = followee_ids(user_id)
+    position = bisect_left(ids, author_id)
+    return position < len(ids) and ids[position] == author_id
+
+
+def forget(user_id):
+    """Сбрасывает массив сейчас и после коммита."""
+    cache.delete(followees_key(user_id))
+    transaction.on_commit(lambda: cache.delete(followees_key(user_id)))
+
+
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        forget(instance.user_id)
+
+
+def follow_deleted(sender, instance, **kwargs):
+    forget(instance.user_id)
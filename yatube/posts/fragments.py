@@ -0,0 +1,103 @@
+"""Персональные куски страниц, которые вставляет ``FragmentMiddleware``."""
+from django.template.loader import render_to_string
+
+from core.fragments import register
+
+from .counters import pending_views, record_view, stored_views
+from .follows import followee_ids, is_following
+from .forms import CommentForm
+from .models import FollowSuggestion, Post
+from .unread import badge, unread_count
+
+FOLLOWED_BADGE = '<span class="badge bg-primary">вы подписаны</span>'
+SUGGESTIONS: int = 5
+
+
+def request_followees(request):
+    """Подписки пользователя, один раз на запрос."""
+    if not hasattr(request, "_followees"):
+        request._followees = (
+            frozenset(followee_ids(request.user.pk))
+            if request.user.is_authenticated
+            else frozenset()
+        )
+    return request._followees
+
+
+def follow_suggestions(user):
+    if not user.is_authenticated:
+        return ()
+    suggestions = FollowSuggestion.objects.filter(user=user)
+    return suggestions.select_related("author")[:SUGGESTIONS]
+
+
+@register("header_user")
+def header_user(request):
+    context = {}
+    if request.user.is_authenticated:
+        context["unread"] = badge(unread_count(request.user.pk))
+    return render_to_string(
+        "includes/header_user.html", context, request=request
+    )
+
+
+@register("switcher")
+def switcher(request):
+    return render_to_string("includes/switcher.html", request=request)
+
+
+@register("followed")
+def followed(request, author_id):
+    if int(author_id) in request_followees(request):
+        return FOLLOWED_BADGE
+    return ""
+
+
+@register("follow_button")
+def follow_button(request, author_id, username):
+    following = request.user.is_authenticated and is_following(
+        request.user.pk, int(author_id)
+    )
+    return render_to_string(
+        "includes/follow_button.html",
+        {"following": following, "author": username},
+    )
+
+
+@register("suggestions")
+def suggestions(request):
+    return render_to_string(
+        "includes/suggestions.html",
+        {"suggestions": follow_suggestions(request.user)},
+        request,
+    )
+
+
+@register("comment_form")
+def comment_form(request, post_id):
+    if not request.user.is_authenticated:
+        return ""
+    return render_to_string(
+        "includes/comment_form.html",
+        {"post_id": post_id, "form": CommentForm()},
+        request,
+    )
+
+
+@register("reply_form")
+def reply_form(request, post_id, comment_id, depth):
+    if not request.user.is_authenticated:
+        return ""
+    return render_to_string(
+        "includes/reply_form.html",
+        {"post_id": post_id, "comment_id": comment_id, "depth": depth},
+        request,
+    )
+
+
+@register("views")
+def views(request, post_id, author_id):
+    """Засчитывает просмотр и выводит счётчик — и при попадании в кэш."""
+    post = Post(pk=int(post_id), author_id=int(author_id))
+    record_view(post)
+    return str(stored_views(post) + pending_views(post))
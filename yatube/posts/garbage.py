@@ -0,0 +1,134 @@
+"""Сборка мусора в ``MEDIA_ROOT``: картинки постов и миниатюры sorl."""
+import os
+import time
+from itertools import islice
+
+from django.db.models.query import QuerySet
+from sorl.thumbnail import default
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix, del_prefix
+
+from .media import referenced, storage
+
+CHUNK_SIZE: int = 500
+GRACE_SECONDS: int = 60 * 60
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def walk(file_storage, directory):
+    """Имена файлов под ``directory`` по одному, каталог за каталогом."""
+    location = os.path.abspath(file_storage.location)
+    for root, dirs, files in os.walk(file_storage.path(directory)):
+        dirs.sort()
+        for filename in sorted(files):
+            path = os.path.relpath(os.path.join(root, filename), location)
+            yield path.replace(os.sep, "/")
+
+
+def settled(file_storage, names, grace):
+    """``(имя, размер)`` файлов, которые не менялись ``grace`` секунд."""
+    cutoff = time.time() - grace
+    for name in names:
+        try:
+            stat = os.stat(file_storage.path(name))
+        except FileNotFoundError:
+            continue
+        if stat.st_mtime <= cutoff:
+            yield name, stat.st_size
+
+
+def orphan_images(size=CHUNK_SIZE, grace=GRACE_SECONDS):
+    """``(имя, размер)`` картинок постов, которые никому не нужны."""
+    from .models import Post
+
+    images = storage()
+    directory = Post._meta.get_field("image").upload_to
+    for chunk in chunks(walk(images, directory), size):
+        used = referenced(chunk)
+        yield from settled(
+            images, [name for name in chunk if name not in used], grace
+        )
+
+
+def remove_image(name):
+    """Удаляет картинку, её миниатюры и записи о них в sorl."""
+    from .models import MediaFile
+
+    MediaFile.objects.filter(name=name).delete()
+    delete_thumbnails(ImageFile(name, storage()))
+
+
+def kv_keys(identity, size):
+    """Ключи KV-хранилища sorl без префикса, пачками по ``size``."""
+    raw = default.kvstore._find_keys_raw(add_prefix("", identity))
+    if not isinstance(raw, QuerySet):
+        for chunk in chunks(raw or (), size):
+            yield [del_prefix(key) for key in chunk]
+        return
+    last = ""
+    while True:
+        page = list(raw.filter(key__gt=last).order_by("key")[:size])
+        if not page:
+            return
+        yield [del_prefix(key) for key in page]
+        last = page[-1]
+
+
+def dead_keys(size=CHUNK_SIZE):
+    """``(ключ, вид)`` записей sorl, которые больше ничему не соответствуют."""
+    kvstore = default.kvstore
+    for chunk in kv_keys("image", size):
+        for key in chunk:
+            image_file = kvstore._get(key)
+            if image_file is not None and not image_file.exists():
+                yield key, "image"
+    for chunk in kv_keys("thumbnails", size):
+        for key in chunk:
+            if kvstore._get(key) is None:
+                yield key, "thumbnails"
+
+
+def remove_key(key, identity):
+    """Удаляет запись sorl; у картинки — и её миниатюры с файлами."""
+    kvstore = default.kvstore
+    if identity == "image":
+        image_file = kvstore._get(key)
+        if image_file is not None:
+            kvstore.delete(image_file)
+        return
+    for thumbnail_key in kvstore._get(key, identity="thumbnails") or ():
+        thumbnail = kvstore._get(thumbnail_key)
+        if thumbnail is not None:
+            kvstore.delete(thumbnail, False)
+            thumbnail.delete()
+    kvstore._delete(key, identity="thumbnails")
+
+
+def orphan_thumbnails(size=CHUNK_SIZE, grace=GRACE_SECONDS):
+    """``(имя, размер)`` миниатюр, которых нет в KV-хранилище sorl."""
+    thumbnails = default.storage
+    kvstore = default.kvstore
+    names = walk(thumbnails, thumbnail_settings.THUMBNAIL_PREFIX)
+    for chunk in chunks(names, size):
+        yield from settled(
+            thumbnails,
+            [
+                name for name in chunk
+                if kvstore.get(ImageFile(name, thumbnails)) is None
+            ],
+            grace,
+        )
+
+
+def remove_thumbnail(name):
+    default.storage.delete(name)
@@ -0,0 +1,52 @@
+"""Очистка кэша страниц (``core.pagecache``) при изменении данных."""
+from core.pagecache import purge_on_commit
+
+FEEDS = ("feed:index", "feed:groups")
+
+
+def group_tags(*group_ids):
+    from .models import Group
+
+    slugs = Group.objects.filter(
+        pk__in={pk for pk in group_ids if pk is not None}
+    ).values_list("slug", flat=True)
+    return [f"group:{slug}" for slug in slugs]
+
+
+def post_tags(post, *group_ids):
+    return [
+        f"post:{post.pk}",
+        f"author:{post.author_id}",
+        *FEEDS,
+        *group_tags(post.group_id, *group_ids),
+    ]
+
+
+def post_saved(sender, instance, created, **kwargs):
+    # Группа, с которой пост загружен (см. ``rollups.post_loaded``):
+    # при переносе устаревает и старая страница группы.
+    previous = None if created else instance._loaded_group_id
+    purge_on_commit(*post_tags(instance, previous))
+
+
+def post_deleted(sender, instance, **kwargs):
+    purge_on_commit(*post_tags(instance))
+
+
+def comment_changed(sender, instance, **kwargs):
+    purge_on_commit(f"post:{instance.post_id}", using=instance._state.db)
+
+
+def group_loaded(sender, instance, **kwargs):
+    instance._loaded_slug = instance.__dict__.get("slug")
+
+
+def group_changed(sender, instance, **kwargs):
+    # После смены слага устаревает и страница по старому адресу.
+    slugs = {instance.slug, instance._loaded_slug} - {None}
+    purge_on_commit(*(f"group:{slug}" for slug in slugs), *FEEDS)
+    instance._loaded_slug = instance.slug
+
+
+def user_deleted(sender, instance, **kwargs):
+    purge_on_commit(f"author:{instance.pk}", "feed:trending", *FEEDS)
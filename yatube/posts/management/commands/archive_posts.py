@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts.archive import archive_alias, archive_batch, prepare_archive
+from posts.sharding import post_shard_key, shard_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит посты старше ARCHIVE_AFTER_DAYS дней с комментариями "
+        "в архивную базу (запускать по cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=settings.ARCHIVE_AFTER_DAYS
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if not archive_alias():
+            raise CommandError("Архив выключен: POST_ARCHIVE пуст")
+        prepare_archive()
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        for alias in shard_aliases():
+            moved = 0
+            while True:
+                ids = archive_batch(alias, cutoff, options["batch_size"])
+                if not ids:
+                    break
+                cache.set_many(
+                    {post_shard_key(pk): archive_alias() for pk in ids}
+                )
+                moved += len(ids)
+            self.stdout.write(f"{alias}: в архив перенесено постов {moved}")
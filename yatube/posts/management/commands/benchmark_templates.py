@@ -0,0 +1,126 @@
+import statistics
+import time
+from datetime import datetime, timezone
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection
+from django.template import TemplateDoesNotExist, engines
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from core.templating import reset_template_cache, uses_cached_loader
+from posts.forms import CommentForm
+from posts.models import Comment, Group, GroupStats, Post, User
+from posts.threads import root_path
+
+TEMPLATES = (
+    "posts/index.html",
+    "posts/follow.html",
+    "posts/group_list.html",
+    "posts/groups.html",
+    "posts/profile.html",
+    "posts/post_detail.html",
+    "posts/trending.html",
+    "posts/create_or_update_post.html",
+    "includes/post.html",
+    "includes/comment_list.html",
+)
+MOMENT = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+
+def fixed_context(posts_count):
+    """Один и тот же контекст без обращений к базе."""
+    author = User(pk=1, username="bench", first_name="Лев", last_name="Т")
+    group = Group(pk=1, title="Группа", slug="bench", description="Описание")
+    posts = [
+        Post(
+            pk=pk, author=author, group=group, pub_date=MOMENT,
+            text="Текст поста для замера рендеринга. " * 10,
+        )
+        for pk in range(1, posts_count + 1)
+    ]
+    post = posts[0]
+    comments = []
+    for pk in range(1, 11):
+        comment = Comment(
+            pk=pk, post=post, author=author, created=MOMENT,
+            text="Комментарий " * 5, path=root_path(pk),
+        )
+        comments.append(comment)
+    stats = GroupStats(pk=1, group=group, posts_count=posts_count)
+    stats.authors = [author]
+    return {
+        "page_obj": Paginator(posts, 10).get_page(1),
+        "post": post,
+        "group": group,
+        "username": author,
+        "author": author,
+        "form": CommentForm(),
+        "comments": comments,
+        "next_cursor": None,
+        "groups": [stats],
+        "trending_groups": [group],
+        "suggestions": [],
+        "following": False,
+        "is_edit": False,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет время рендеринга шаблонов на фиксированном контексте, "
+        "отдельно от стоимости запросов к базе"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("templates", nargs="*", default=TEMPLATES)
+        parser.add_argument("--repeat", type=int, default=200)
+        parser.add_argument("--posts", type=int, default=10)
+        parser.add_argument(
+            "--engine", action="append", choices=("django", "jinja2"),
+            help="Движок шаблонов; по умолчанию оба, для сравнения",
+        )
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        context = fixed_context(options["posts"])
+        repeat = options["repeat"]
+
+        cached = uses_cached_loader(engines["django"])
+        self.stdout.write(
+            "Кэш шаблонов DTL: "
+            + ("включён" if cached else "выключен (DEBUG), первый рендер "
+               "не отличается от остальных")
+        )
+        self.stdout.write(
+            f"{'шаблон':<36}{'движок':<8}{'первый, мс':>12}"
+            f"{'медиана, мс':>13}{'мин, мс':>10}{'запросов':>10}"
+        )
+        for name in options["templates"]:
+            for engine in options["engine"] or ("django", "jinja2"):
+                self.benchmark(name, engine, context, request, repeat)
+
+    def benchmark(self, name, engine, context, request, repeat):
+        reset_template_cache()
+        started = time.perf_counter()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                render_to_string(name, context, request, using=engine)
+        except TemplateDoesNotExist:
+            return
+        first = time.perf_counter() - started
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render_to_string(name, context, request, using=engine)
+            timings.append(time.perf_counter() - started)
+        self.stdout.write(
+            f"{name:<36}{engine:<8}{first * 1000:>12.2f}"
+            f"{statistics.median(timings) * 1000:>13.3f}"
+            f"{min(timings) * 1000:>10.3f}{len(queries):>10}"
+        )
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from posts.garbage import (
+    CHUNK_SIZE, GRACE_SECONDS, dead_keys, orphan_images, orphan_thumbnails,
+    remove_image, remove_key, remove_thumbnail
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет картинки постов, миниатюры и записи sorl-thumbnail, "
+        "которые ни на что не ссылаются (запускать по cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать, что будет удалено",
+        )
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=GRACE_SECONDS,
+            help="Не трогать файлы моложе стольких секунд",
+        )
+        parser.add_argument("--batch-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        size = options["batch_size"]
+        grace = options["grace"]
+
+        images, image_bytes = self.collect(
+            orphan_images(size, grace), remove_image, dry_run
+        )
+        keys = 0
+        for key, identity in dead_keys(size):
+            if dry_run:
+                self.stdout.write(f"{identity}: {key}")
+            else:
+                remove_key(key, identity)
+            keys += 1
+        thumbnails, thumbnail_bytes = self.collect(
+            orphan_thumbnails(size, grace), remove_thumbnail, dry_run
+        )
+
+        verb = "Будет удалено" if dry_run else "Удалено"
+        self.stdout.write(
+            f"{verb} картинок: {images} ({filesizeformat(image_bytes)}), "
+            f"миниатюр: {thumbnails} ({filesizeformat(thumbnail_bytes)}), "
+            f"записей sorl: {keys}"
+        )
+
+    def collect(self, orphans, remove, dry_run):
+        count = total = 0
+        for name, size in orphans:
+            if dry_run:
+                self.stdout.write(name)
+            else:
+                remove(name)
+            count += 1
+            total += size
+        return count, total
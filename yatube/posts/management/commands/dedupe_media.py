@@ -0,0 +1,93 @@
+from collections import Counter
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.defaultfilters import filesizeformat
+from sorl.thumbnail import delete as delete_thumbnails
+from sorl.thumbnail.images import ImageFile
+
+from core.pagecache import ALL, purge
+from core.storage import content_hash
+from posts.archive import archive_aliases
+from posts.media import storage
+from posts.models import MediaFile, Post
+from posts.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        "Переименовывает картинки постов по хэшу содержимого, удаляет "
+        "дубликаты и пересчитывает ссылки MediaFile"
+    )
+
+    def handle(self, *args, **options):
+        self.storage = storage()
+        self.upload_to = Post._meta.get_field("image").upload_to
+        renamed = {}
+        freed = 0
+        for alias in shard_aliases() + archive_aliases():
+            names = (
+                Post.objects.using(alias)
+                .exclude(image="")
+                .order_by()
+                .values_list("image", flat=True)
+                .distinct()
+            )
+            for name in names:
+                if name not in renamed:
+                    renamed[name], size = self.rehash(name)
+                    freed += size
+                if renamed[name] != name:
+                    Post.objects.using(alias).filter(image=name).update(
+                        image=renamed[name]
+                    )
+        # Ни одна база больше не ссылается на старые имена, а новые
+        # загрузки их не получают, так что удаляем сразу, не дожидаясь
+        # collect_media.
+        for old, new in renamed.items():
+            if old != new:
+                delete_thumbnails(
+                    ImageFile(old, self.storage), delete_file=False
+                )
+                self.storage.delete(old)
+
+        refs = self.recount()
+        purge(ALL)
+        duplicates = sum(1 for old, new in renamed.items() if old != new)
+        self.stdout.write(
+            f"Файлов: {len(refs)}, переименовано: {duplicates}, "
+            f"освобождено: {filesizeformat(freed)}"
+        )
+
+    def rehash(self, name):
+        """Новое имя файла и сколько байт освобождает его переименование."""
+        if not self.storage.exists(name):
+            self.stderr.write(f"{name}: файла нет, пропущен")
+            return name, 0
+        with self.storage.open(name) as original:
+            digest = content_hash(File(original))
+            base = self.upload_to + name.rsplit("/", 1)[-1]
+            new = self.storage.hashed_name(base, digest)
+            if new == name:
+                return name, 0
+            if self.storage.exists(new):
+                return new, self.storage.size(name)
+            self.storage.save(base, original)
+        return new, 0
+
+    def recount(self):
+        refs = Counter()
+        for alias in shard_aliases() + archive_aliases():
+            refs.update(
+                Post.objects.using(alias)
+                .exclude(image="")
+                .values_list("image", flat=True)
+            )
+        with transaction.atomic():
+            MediaFile.objects.all().delete()
+            MediaFile.objects.bulk_create(
+                MediaFile(name=name, refs=count)
+                for name, count in refs.items()
+            )
+        return refs
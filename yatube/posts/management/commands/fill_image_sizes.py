@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from core.pagecache import ALL, purge
+from posts.archive import archive_aliases
+from posts.media import image_size, make_post_thumbnail
+from posts.models import Post
+from posts.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет размеры картинок у старых постов и строит для них "
+        "миниатюры ленты"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        filled = 0
+        for alias in shard_aliases() + archive_aliases():
+            posts = (
+                Post.objects.using(alias)
+                .exclude(image="")
+                .filter(image_width__isnull=True)
+                .order_by("pk")
+            )
+            last = 0
+            while True:
+                batch = list(
+                    posts.filter(pk__gt=last)[:options["batch_size"]]
+                )
+                if not batch:
+                    break
+                for post in batch:
+                    width, height = image_size(post.image)
+                    if width is None:
+                        self.stderr.write(f"{post.image}: не прочитать")
+                        continue
+                    Post.objects.using(alias).filter(pk=post.pk).update(
+                        image_width=width, image_height=height
+                    )
+                    post.image_width, post.image_height = width, height
+                    make_post_thumbnail(post)
+                    filled += 1
+                last = batch[-1].pk
+        purge(ALL)
+        self.stdout.write(f"Заполнено размеров картинок: {filled}")
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from core.pagecache import purge
+from posts.archive import archive_aliases
+from posts.models import Post
+from posts.sharding import shard_aliases
+from posts.tagging import index_posts
+
+
+class Command(BaseCommand):
+    help = "Заполняет индекс хэштегов и упоминаний для существующих постов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        for alias in shard_aliases() + archive_aliases():
+            posts = Post.objects.using(alias).order_by("pk")
+            last = indexed = 0
+            while True:
+                batch = list(
+                    posts.filter(pk__gt=last)[:options["batch_size"]]
+                )
+                if not batch:
+                    break
+                stale = index_posts(batch)
+                if stale:
+                    purge(*stale)
+                indexed += len(batch)
+                last = batch[-1].pk
+            self.stdout.write(f"{alias}: проиндексировано постов {indexed}")
@@ -0,0 +1,94 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts.archive import copy_rows
+from posts.models import AuthorShard, Comment, Post, User
+from posts.sharding import (
+    author_shard_key, get_sequence, is_sharded, set_sequence, shard_aliases,
+    shard_for_author
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит посты автора и комментарии к ним на другой шард. "
+        "Чтение продолжает идти со старого шарда до переключения каталога."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("alias")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        if not is_sharded():
+            raise CommandError("Шардирование выключено: POST_SHARDS пуст")
+        target = options["alias"]
+        if target not in shard_aliases():
+            raise CommandError(f"{target} нет в POST_SHARDS")
+        try:
+            author = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"Автор {options['username']} не найден")
+
+        source = shard_for_author(author.pk)
+        if source == target:
+            self.stdout.write(f"{author} уже на {target}")
+            return
+
+        self.batch_size = options["batch_size"]
+        # Первый проход идёт без блокировок: автор продолжает писать
+        # в source, а всё новое докопируется вторым проходом.
+        last_post, last_comment = self.copy(author, source, target, 0, 0)
+        with transaction.atomic(using=source), transaction.atomic():
+            last_post, last_comment = self.copy(
+                author, source, target, last_post, last_comment
+            )
+            AuthorShard.objects.update_or_create(
+                author=author, defaults={"alias": target}
+            )
+            cache.delete(author_shard_key(author.pk))
+            # Удаляем только скопированное: строки, записанные процессами
+            # со старым значением в кэше, останутся в source.
+            moved = Post.objects.using(source).filter(
+                author=author, pk__lte=last_post
+            )
+            Comment.objects.using(source).filter(
+                post__in=moved, pk__lte=last_comment
+            ).delete()
+            deleted, _ = moved.delete()
+
+        self.stdout.write(f"{author}: {source} -> {target}, постов {deleted}")
+
+    def copy(self, author, source, target, last_post, last_comment):
+        sequences = {
+            model: get_sequence(target, model._meta.db_table)
+            for model in (Post, Comment)
+        }
+        posts = Post.objects.using(source).filter(author=author)
+        last_post = self.copy_rows(
+            Post, posts.filter(pk__gt=last_post), target, last_post
+        )
+        comments = Comment.objects.using(source).filter(post__in=posts)
+        last_comment = self.copy_rows(
+            Comment, comments.filter(pk__gt=last_comment), target,
+            last_comment
+        )
+        # id перенесённых строк лежат в диапазоне source: возвращаем
+        # счётчики target, иначе его новые id залезут в чужой диапазон.
+        for model, value in sequences.items():
+            if value is not None:
+                set_sequence(target, model._meta.db_table, value)
+        return last_post, last_comment
+
+    def copy_rows(self, model, queryset, target, last_pk):
+        queryset = queryset.order_by("pk")
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:self.batch_size])
+            if not batch:
+                return last_pk
+            # Сохраняет pub_date и created: bulk_create заменил бы их
+            # текущим временем.
+            copy_rows(model, batch, target)
+            last_pk = batch[-1].pk
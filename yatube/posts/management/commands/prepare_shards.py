@@ -0,0 +1,24 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.models import Comment, Post
+from posts.sharding import (
+    SHARD_ID_SPAN, get_sequence, is_sharded, set_sequence, shard_aliases
+)
+
+
+class Command(BaseCommand):
+    help = "Создаёт таблицы на шардах и выдаёт каждому свой диапазон id"
+
+    def handle(self, *args, **options):
+        if not is_sharded():
+            raise CommandError("Шардирование выключено: POST_SHARDS пуст")
+
+        for index, alias in enumerate(shard_aliases()):
+            call_command("migrate", database=alias, verbosity=0)
+            floor = index * SHARD_ID_SPAN
+            for model in (Post, Comment):
+                table = model._meta.db_table
+                if (get_sequence(alias, table) or 0) < floor:
+                    set_sequence(alias, table, floor)
+            self.stdout.write(f"{alias}: id с {floor + 1}")
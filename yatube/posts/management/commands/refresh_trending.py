@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import TrendScore
+from posts.trending import forget_decayed, refresh
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает топы популярных постов и групп (запускать по cron)"
+
+    def handle(self, *args, **options):
+        for kind, _ in TrendScore.KINDS:
+            forgotten = forget_decayed(kind)
+            ids = refresh(kind)
+            self.stdout.write(
+                f"{kind}: в топе {len(ids)}, забыто {forgotten}"
+            )
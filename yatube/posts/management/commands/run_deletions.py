@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from posts.deletion import CHUNK_SIZE, claim, run
+from posts.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        "Выполняет задания на удаление пользователей и групп "
+        "(запускать по cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Сколько строк удалять в одной транзакции",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Перезапустить прерванные задания в состоянии running",
+        )
+
+    def handle(self, *args, **options):
+        if options["resume"]:
+            DeletionJob.objects.filter(status=DeletionJob.RUNNING).update(
+                status=DeletionJob.PENDING
+            )
+        for job in DeletionJob.objects.filter(status=DeletionJob.PENDING):
+            if not claim(job):
+                continue
+            self.stdout.write(f"{job}: начато")
+            run(job, options["chunk_size"], self.report)
+            self.stdout.write(f"{job}: обработано строк {job.total}")
+
+    def report(self, job):
+        self.stdout.write(f"{job}: {job.done}/{job.total} ({job.progress}%)")
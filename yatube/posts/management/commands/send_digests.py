@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.digests import BATCH_SIZE, send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        "Рассылает подписчикам дайджесты новых постов (запускать по cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        stats = send_digests(batch_size=options["batch_size"])
+        self.stdout.write(
+            f"Событий: {stats['events']}, "
+            f"получателей: {stats['recipients']}, "
+            f"писем: {stats['emails']}, пачек: {stats['batches']} "
+            f"за {stats['seconds']:.2f} с "
+            f"({stats['per_second']:.1f} писем/с)"
+        )
@@ -0,0 +1,128 @@
+"""Счётчики ссылок на картинки постов."""
+import logging
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import transaction
+from django.db.models import F
+
+from core.thumbnails import make_thumbnail, sized_thumbnail
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_GEOMETRY = "960x339"
+THUMBNAIL_OPTIONS = {"crop": "center", "upscale": True}
+
+
+def storage():
+    from .models import Post
+
+    return Post._meta.get_field("image").storage
+
+
+def acquire(name):
+    from .models import MediaFile
+
+    MediaFile.objects.get_or_create(name=name)
+    MediaFile.objects.filter(name=name).update(refs=F("refs") + 1)
+
+
+def referenced(names):
+    """Какие из ``names`` стоят в ``Post.image`` хотя бы одной базы."""
+    from .archive import archive_aliases
+    from .models import Post
+    from .sharding import shard_aliases
+
+    found = set()
+    for alias in shard_aliases() + archive_aliases():
+        rest = [name for name in names if name not in found]
+        if not rest:
+            break
+        found.update(
+            Post.objects.using(alias)
+            .filter(image__in=rest)
+            .values_list("image", flat=True)
+        )
+    return found
+
+
+def is_referenced(name):
+    return bool(referenced([name]))
+
+
+def release(name):
+    """Уменьшает счётчик; ``True``, если ссылок на файл больше нет."""
+    # Файл не удаляем: повторная загрузка могла уже получить это имя.
+    # Его уберёт collect_media после периода ожидания.
+    from .models import MediaFile
+
+    with transaction.atomic():
+        MediaFile.objects.filter(name=name, refs__gt=0).update(
+            refs=F("refs") - 1
+        )
+        deleted, _ = MediaFile.objects.filter(name=name, refs=0).delete()
+    return bool(deleted) and not is_referenced(name)
+
+
+def image_size(image):
+    """Ширина и высота картинки или ``(None, None)``."""
+    try:
+        return image.width, image.height
+    except (OSError, SuspiciousFileOperation):
+        logger.warning("Не удалось прочитать размер картинки %s", image)
+        return None, None
+
+
+def post_thumbnail(post):
+    return sized_thumbnail(
+        post.image,
+        (post.image_width, post.image_height),
+        THUMBNAIL_GEOMETRY,
+        **THUMBNAIL_OPTIONS,
+    )
+
+
+def make_post_thumbnail(post):
+    return make_thumbnail(
+        post.image,
+        (post.image_width, post.image_height),
+        THUMBNAIL_GEOMETRY,
+        **THUMBNAIL_OPTIONS,
+    )
+
+
+def post_loaded(sender, instance, **kwargs):
+    instance._loaded_image = instance.image.name
+
+
+def post_presave(sender, instance, update_fields=None, **kwargs):
+    """Размер новой картинки — пока загрузка ещё в памяти."""
+    if update_fields is not None and "image" not in update_fields:
+        return
+    image = instance.image
+    if not image:
+        instance.image_width = instance.image_height = None
+    elif (
+        image.name != instance._loaded_image
+        or not instance.image_width
+        or not instance.image_height
+    ):
+        instance.image_width, instance.image_height = image_size(image)
+
+
+def post_saved(sender, instance, created, **kwargs):
+    previous = None if created else instance._loaded_image
+    current = instance.image.name
+    if previous == current:
+        return
+    if current:
+        acquire(current)
+        transaction.on_commit(lambda: make_post_thumbnail(instance))
+    if previous:
+        transaction.on_commit(lambda: release(previous))
+    instance._loaded_image = current
+
+
+def post_deleted(sender, instance, **kwargs):
+    if instance.image:
+        name = instance.image.name
+        transaction.on_commit(lambda: release(name))
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_root_paths(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+    db_alias = schema_editor.connection.alias
+    comments = Comment.objects.using(db_alias).filter(path='')
+    for comment in comments.only('pk').iterator():
+        comments.filter(pk=comment.pk).update(path=f'{comment.pk:015d}/')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_auto_20261019_0953'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='posts_comme_post_id_944a68_idx',
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='posts.Comment', verbose_name='Ответ на комментарий'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=240, verbose_name='Путь в ветке'),
+        ),
+        migrations.RunPython(fill_root_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'path'], name='posts_comme_post_id_abd11d_idx'),
+        ),
+    ]
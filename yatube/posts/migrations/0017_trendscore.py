@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendScore',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('group', 'Группа')], max_length=5, verbose_name='Тип')),
+                ('object_id', models.BigIntegerField(verbose_name='id объекта')),
+                ('score', models.FloatField(verbose_name='Логарифм оценки')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='trendscore',
+            index=models.Index(fields=['kind', '-score'], name='posts_trend_kind_0d0275_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='trendscore',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_trend'),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    GroupAuthorStats = apps.get_model('posts', 'GroupAuthorStats')
+    db_alias = schema_editor.connection.alias
+
+    posts = (
+        Post.objects.using(db_alias).filter(group__isnull=False).order_by()
+    )
+    totals = {
+        row['group']: row
+        for row in posts.values('group').annotate(
+            posts_count=models.Count('pk'),
+            last_activity=models.Max('pub_date'),
+        )
+    }
+    by_author = posts.values('group', 'author').annotate(
+        posts_count=models.Count('pk')
+    )
+    GroupAuthorStats.objects.using(db_alias).bulk_create(
+        GroupAuthorStats(
+            group_id=row['group'],
+            author_id=row['author'],
+            posts_count=row['posts_count'],
+        )
+        for row in by_author
+    )
+    stats = []
+    for group in Group.objects.using(db_alias).only('pk'):
+        total = totals.get(group.pk, {})
+        top = (
+            GroupAuthorStats.objects.using(db_alias)
+            .filter(group=group)
+            .order_by('-posts_count', 'author_id')
+            .values_list('author_id', flat=True)[:3]
+        )
+        stats.append(GroupStats(
+            group=group,
+            posts_count=total.get('posts_count', 0),
+            last_activity=(
+                total.get('last_activity') or django.utils.timezone.now()
+            ),
+            top_authors=','.join(str(pk) for pk in top),
+        ))
+    GroupStats.objects.using(db_alias).bulk_create(stats)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0017_trendscore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('last_activity', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Последняя активность')),
+                ('top_authors', models.CharField(blank=True, max_length=200, verbose_name='id самых активных авторов')),
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='posts.Group', verbose_name='Группа')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GroupAuthorStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='author_stats', to='posts.Group', verbose_name='Группа')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='groupstats',
+            index=models.Index(fields=['-last_activity'], name='posts_group_last_ac_f9d577_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupauthorstats',
+            index=models.Index(fields=['group', '-posts_count'], name='posts_group_group_i_105f81_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupauthorstats',
+            constraint=models.UniqueConstraint(fields=('group', 'author'), name='unique_group_author'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0023_post_tags_mentions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.BigIntegerField(verbose_name='id поста')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор поста')),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0024_digest_events'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedWatermark',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Читатель')),
+                ('seen', models.DateTimeField(verbose_name='Самый новый пост ленты на момент визита')),
+            ],
+        ),
+    ]
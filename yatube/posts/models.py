@@ -1,9 +1,16 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, router, transaction
+from django.utils import timezone
+
+from core.storage import ContentAddressedStorage
 
 
 User = get_user_model()
 
+PATH_DIGITS = 15
+PATH_STEP = PATH_DIGITS + 1
+MAX_THREAD_DEPTH = 15
+
 
 class Group(models.Model):
     title = models.CharField(verbose_name="Название группы", max_length=200)
@@ -25,7 +32,8 @@ class Post(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name="posts",
-        verbose_name="Автор поста"
+        verbose_name="Автор поста",
+        db_constraint=False,
     )
     group = models.ForeignKey(
         Group,
@@ -34,16 +42,36 @@ class Post(models.Model):
         null=True,
         blank=True,
         verbose_name="Группа",
+        db_constraint=False,
     )
     image = models.ImageField(
         verbose_name='Картинка',
         upload_to='posts/',
-        blank=True
+        storage=ContentAddressedStorage(),
+        blank=True,
+        db_index=True
+    )
+    # Заполняются при сохранении (``posts.media.post_presave``), чтобы
+    # миниатюры строились без открытия файла картинки.
+    image_width = models.PositiveIntegerField(
+        verbose_name="Ширина картинки", null=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        verbose_name="Высота картинки", null=True, editable=False
+    )
+    views = models.PositiveIntegerField(
+        verbose_name="Просмотры", default=0, editable=False
     )
 
     def __str__(self):
         return self.text[:15]
 
+    def thumbnail(self):
+        """Миниатюра картинки для ленты и страницы поста."""
+        from .media import post_thumbnail
+
+        return post_thumbnail(self)
+
     class Meta:
         ordering = ("-pub_date",)
 
@@ -59,16 +87,53 @@ class Comment(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name="comments",
-        verbose_name="Автор комментария"
+        verbose_name="Автор комментария",
+        db_constraint=False,
     )
     text = models.TextField(verbose_name="Текст комментария")
     created = models.DateTimeField(
         auto_now_add=True, verbose_name="Дата публикации"
     )
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        related_name="replies",
+        null=True,
+        blank=True,
+        verbose_name="Ответ на комментарий",
+    )
+    path = models.CharField(
+        verbose_name="Путь в ветке",
+        max_length=PATH_STEP * MAX_THREAD_DEPTH,
+        blank=True,
+        editable=False,
+    )
 
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        using = kwargs.get("using") or router.db_for_write(
+            Comment, instance=self
+        )
+        # Очистка кэша по сигналу ждёт коммита, то есть записи пути.
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            if not self.path:
+                # Путь строится из pk, поэтому дописывается после INSERT.
+                prefix = self.parent.path if self.parent_id else ""
+                self.path = f"{prefix}{self.pk:0{PATH_DIGITS}d}/"
+                Comment.objects.using(self._state.db).filter(
+                    pk=self.pk
+                ).update(path=self.path)
+
+    @property
+    def depth(self):
+        return len(self.path) // PATH_STEP - 1
+
+    class Meta:
+        indexes = [models.Index(fields=["post", "path"])]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -92,3 +157,253 @@ class Follow(models.Model):
             models.UniqueConstraint(
                 fields=["user", "author"], name="unique_follow")
         ]
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="follow_suggestions",
+        verbose_name="Читатель",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Рекомендованный автор",
+    )
+    score = models.FloatField(verbose_name="Оценка")
+    rank = models.PositiveSmallIntegerField(verbose_name="Место")
+
+    def __str__(self):
+        return f"{self.user} -> {self.author}"
+
+    class Meta:
+        ordering = ("user", "rank")
+        indexes = [models.Index(fields=["user", "rank"])]
+
+
+class TrendScore(models.Model):
+    POST = "post"
+    GROUP = "group"
+    KINDS = ((POST, "Пост"), (GROUP, "Группа"))
+
+    kind = models.CharField(verbose_name="Тип", max_length=5, choices=KINDS)
+    object_id = models.BigIntegerField(verbose_name="id объекта")
+    score = models.FloatField(verbose_name="Логарифм оценки")
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="unique_trend"
+            )
+        ]
+        indexes = [models.Index(fields=["kind", "-score"])]
+
+
+class GroupStats(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        related_name="stats",
+        verbose_name="Группа",
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name="Постов", default=0
+    )
+    last_activity = models.DateTimeField(
+        verbose_name="Последняя активность", default=timezone.now
+    )
+    top_authors = models.CharField(
+        verbose_name="id самых активных авторов",
+        max_length=200,
+        blank=True,
+    )
+
+    def __str__(self):
+        return str(self.group)
+
+    @property
+    def top_author_ids(self):
+        return [int(pk) for pk in self.top_authors.split(",") if pk]
+
+    class Meta:
+        indexes = [models.Index(fields=["-last_activity"])]
+
+
+class GroupAuthorStats(models.Model):
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name="author_stats",
+        verbose_name="Группа",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Автор",
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name="Постов", default=0
+    )
+
+    def __str__(self):
+        return f"{self.author} в {self.group}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["group", "author"], name="unique_group_author"
+            )
+        ]
+        indexes = [models.Index(fields=["group", "-posts_count"])]
+
+
+class AuthorShard(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name="shard",
+        verbose_name="Автор",
+    )
+    alias = models.CharField(verbose_name="База данных", max_length=100)
+
+    def __str__(self):
+        return f"{self.author} -> {self.alias}"
+
+
+class DeletionJob(models.Model):
+    USER = "user"
+    GROUP = "group"
+    KINDS = ((USER, "Пользователь"), (GROUP, "Группа"))
+
+    DELETE = "delete"
+    ANONYMIZE = "anonymize"
+    MODES = ((DELETE, "Удалить всё"), (ANONYMIZE, "Обезличить"))
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (PENDING, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Готово"),
+        (FAILED, "Ошибка"),
+    )
+
+    kind = models.CharField(
+        verbose_name="Что удалить", max_length=5, choices=KINDS
+    )
+    object_id = models.BigIntegerField(verbose_name="id объекта")
+    mode = models.CharField(
+        verbose_name="Режим", max_length=9, choices=MODES, default=DELETE
+    )
+    status = models.CharField(
+        verbose_name="Состояние",
+        max_length=7,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    total = models.PositiveIntegerField(verbose_name="Всего строк", default=0)
+    done = models.PositiveIntegerField(verbose_name="Обработано", default=0)
+    error = models.TextField(verbose_name="Ошибка", blank=True)
+    created = models.DateTimeField(
+        auto_now_add=True, verbose_name="Создано"
+    )
+    finished = models.DateTimeField(
+        verbose_name="Завершено", null=True, blank=True
+    )
+
+    def __str__(self):
+        kind = self.get_kind_display().lower()
+        return f"{self.get_mode_display()}: {kind} {self.object_id}"
+
+    @property
+    def progress(self):
+        return 100 * self.done // self.total if self.total else 100
+
+    class Meta:
+        ordering = ("created",)
+        indexes = [models.Index(fields=["status", "created"])]
+
+
+class MediaFile(models.Model):
+    name = models.CharField(verbose_name="Файл", max_length=100, unique=True)
+    refs = models.PositiveIntegerField(verbose_name="Ссылок", default=0)
+
+    def __str__(self):
+        return f"{self.name} ({self.refs})"
+
+
+class PostTag(models.Model):
+    post_id = models.BigIntegerField(verbose_name="id поста")
+    tag = models.CharField(verbose_name="Тег", max_length=100)
+    pub_date = models.DateTimeField(verbose_name="Дата публикации поста")
+
+    def __str__(self):
+        return f"#{self.tag} в посте {self.post_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post_id", "tag"], name="unique_post_tag"
+            )
+        ]
+        indexes = [models.Index(fields=["tag", "-pub_date", "-id"])]
+
+
+class Mention(models.Model):
+    post_id = models.BigIntegerField(verbose_name="id поста")
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="mentions",
+        verbose_name="Упомянутый пользователь",
+    )
+    pub_date = models.DateTimeField(verbose_name="Дата публикации поста")
+
+    def __str__(self):
+        return f"@{self.user_id} в посте {self.post_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post_id", "user"], name="unique_mention"
+            )
+        ]
+        indexes = [models.Index(fields=["user", "-pub_date", "-id"])]
+
+
+class DigestEvent(models.Model):
+    post_id = models.BigIntegerField(verbose_name="id поста")
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Автор поста",
+    )
+    created = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
+
+    def __str__(self):
+        return f"Пост {self.post_id} от {self.author_id}"
+
+
+class FeedWatermark(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="+",
+        verbose_name="Читатель",
+    )
+    seen = models.DateTimeField(
+        verbose_name="Самый новый пост ленты на момент визита"
+    )
+
+    def __str__(self):
+        return f"{self.user_id}: {self.seen}"
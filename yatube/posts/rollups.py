@@ -0,0 +1,110 @@
+"""Сводка по группам для каталога ``/groups/``."""
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+TOP_AUTHORS: int = 3
+
+
+def stats_for(group_id):
+    from .models import GroupStats
+
+    stats, _ = GroupStats.objects.get_or_create(group_id=group_id)
+    return stats
+
+
+def refresh_top_authors(group_id):
+    from .models import GroupAuthorStats, GroupStats
+
+    ids = (
+        GroupAuthorStats.objects.filter(group_id=group_id, posts_count__gt=0)
+        .order_by("-posts_count", "author_id")
+        .values_list("author_id", flat=True)[:TOP_AUTHORS]
+    )
+    GroupStats.objects.filter(group_id=group_id).update(
+        top_authors=",".join(str(pk) for pk in ids)
+    )
+
+
+def add_post(group_id, author_id, moment):
+    from .models import GroupAuthorStats, GroupStats
+
+    stats_for(group_id)
+    GroupStats.objects.filter(group_id=group_id).update(
+        posts_count=F("posts_count") + 1
+    )
+    GroupStats.objects.filter(
+        group_id=group_id, last_activity__lt=moment
+    ).update(last_activity=moment)
+    GroupAuthorStats.objects.get_or_create(
+        group_id=group_id, author_id=author_id
+    )
+    GroupAuthorStats.objects.filter(
+        group_id=group_id, author_id=author_id
+    ).update(posts_count=F("posts_count") + 1)
+    refresh_top_authors(group_id)
+
+
+def remove_post(group_id, author_id):
+    from .models import GroupAuthorStats, GroupStats
+
+    GroupStats.objects.filter(group_id=group_id, posts_count__gt=0).update(
+        posts_count=F("posts_count") - 1
+    )
+    GroupAuthorStats.objects.filter(
+        group_id=group_id, author_id=author_id, posts_count__gt=0
+    ).update(posts_count=F("posts_count") - 1)
+    refresh_top_authors(group_id)
+
+
+def post_loaded(sender, instance, **kwargs):
+    instance._loaded_group_id = instance.group_id
+
+
+def post_saved(sender, instance, created, **kwargs):
+    previous = None if created else instance._loaded_group_id
+    if previous == instance.group_id:
+        return
+    if previous is not None:
+        remove_post(previous, instance.author_id)
+    if instance.group_id is not None:
+        add_post(instance.group_id, instance.author_id, instance.pub_date)
+    instance._loaded_group_id = instance.group_id
+
+
+def post_deleted(sender, instance, **kwargs):
+    if instance.group_id is not None:
+        remove_post(instance.group_id, instance.author_id)
+
+
+def group_saved(sender, instance, created, **kwargs):
+    if created:
+        stats_for(instance.pk)
+
+
+def author_groups(author_id):
+    from .models import GroupAuthorStats
+
+    return list(
+        GroupAuthorStats.objects.filter(author_id=author_id).values_list(
+            "group_id", flat=True
+        )
+    )
+
+
+def remove_author(author_id):
+    """Вычитает из сводок все посты автора; возвращает id его групп."""
+    from .models import GroupAuthorStats, GroupStats
+
+    rows = list(
+        GroupAuthorStats.objects.filter(author_id=author_id).values_list(
+            "group_id", "posts_count"
+        )
+    )
+    for group_id, count in rows:
+        GroupStats.objects.filter(group_id=group_id).update(
+            posts_count=Greatest(F("posts_count") - count, 0)
+        )
+    GroupAuthorStats.objects.filter(author_id=author_id).delete()
+    for group_id, _ in rows:
+        refresh_top_authors(group_id)
+    return [group_id for group_id, _ in rows]
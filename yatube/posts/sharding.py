@@ -0,0 +1,242 @@
+"""Шардирование постов и комментариев по автору."""
+import heapq
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import Http404
+
+PRIMARY_DB = "default"
+SHARDED_MODELS = ("posts.post", "posts.comment")
+SHARD_ID_SPAN = 10 ** 12
+SHARD_CACHE_TIMEOUT = 60 * 60
+
+
+def shard_aliases():
+    return list(settings.POST_SHARDS) or [PRIMARY_DB]
+
+
+def is_sharded():
+    return len(shard_aliases()) > 1
+
+
+def author_shard_key(author_id):
+    return f"author_shard:{author_id}"
+
+
+def post_shard_key(post_id):
+    return f"post_shard:{post_id}"
+
+
+def hashed_shard(author_id):
+    aliases = shard_aliases()
+    return aliases[zlib.crc32(str(author_id).encode()) % len(aliases)]
+
+
+def shard_for_author(author_id):
+    if not is_sharded():
+        return PRIMARY_DB
+
+    key = author_shard_key(author_id)
+    alias = cache.get(key)
+    if alias is None:
+        from .models import AuthorShard
+
+        alias = (
+            AuthorShard.objects.filter(author_id=author_id)
+            .values_list("alias", flat=True)
+            .first()
+        ) or hashed_shard(author_id)
+        cache.set(key, alias, SHARD_CACHE_TIMEOUT)
+    return alias
+
+
+def home_shard(post_id):
+    aliases = shard_aliases()
+    index = post_id // SHARD_ID_SPAN
+    return aliases[index] if index < len(aliases) else PRIMARY_DB
+
+
+def get_post_or_404(post_id):
+    from .archive import archive_aliases, archived_post
+    from .models import Post
+
+    if not is_sharded():
+        try:
+            return Post.objects.get(pk=post_id)
+        except Post.DoesNotExist:
+            post = archived_post(post_id)
+            if post is None:
+                raise Http404("No Post matches the given query.")
+            return post
+
+    key = post_shard_key(post_id)
+    first = cache.get(key) or home_shard(post_id)
+    candidates = [first] + [
+        a for a in shard_aliases() + archive_aliases() if a != first
+    ]
+    for alias in candidates:
+        post = Post.objects.using(alias).filter(pk=post_id).first()
+        if post is not None:
+            if alias != first:
+                cache.set(key, alias, SHARD_CACHE_TIMEOUT)
+            return post
+    raise Http404("No Post matches the given query.")
+
+
+class MergedPosts:
+    """Scatter-gather по шардам с merge по ``pub_date``."""
+
+    def __init__(self, querysets):
+        self.querysets = querysets
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return self._merge(self.querysets)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start = item.start or 0
+            stop = item.stop
+            querysets = self.querysets
+            if stop is not None:
+                querysets = [queryset[:stop] for queryset in querysets]
+            return list(self._merge(querysets))[start:stop]
+        return self[item:item + 1][0]
+
+    @staticmethod
+    def _merge(querysets):
+        return heapq.merge(
+            *querysets,
+            key=lambda post: (post.pub_date, post.pk),
+            reverse=True,
+        )
+
+
+def posts_filter(*related, **lookups):
+    """Посты по условию со всех шардов, отсортированные по ``pub_date``."""
+    from .models import Post
+
+    if not is_sharded():
+        return Post.objects.filter(**lookups).select_related(*related)
+    return MergedPosts(
+        [
+            Post.objects.using(alias)
+            .filter(**lookups)
+            .order_by("-pub_date", "-pk")
+            .prefetch_related(*related)
+            for alias in shard_aliases()
+        ]
+    )
+
+
+def author_posts(author, *related):
+    from .archive import with_archive
+    from .models import Post
+
+    queryset = Post.objects.filter(author=author)
+    if not is_sharded():
+        queryset = queryset.select_related(*related)
+    else:
+        queryset = queryset.using(
+            shard_for_author(author.pk)
+        ).prefetch_related(*related)
+    return with_archive(queryset, author, *related)
+
+
+def get_sequence(alias, table):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = %s", [table]
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def set_sequence(alias, table, value):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            "UPDATE sqlite_sequence SET seq = %s WHERE name = %s",
+            [value, table],
+        )
+        if not cursor.rowcount:
+            cursor.execute(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)",
+                [table, value],
+            )
+
+
+def delete_author_rows(sender, instance, using, **kwargs):
+    """Каскадное удаление автора видит только его собственную базу."""
+    from .archive import archive_aliases
+    from .models import Comment, Post
+
+    for alias in shard_aliases() + archive_aliases():
+        if alias == using:
+            continue
+        Comment.objects.using(alias).filter(author_id=instance.pk).delete()
+        Post.objects.using(alias).filter(author_id=instance.pk).delete()
+
+
+def detach_group_rows(sender, instance, using, **kwargs):
+    from .archive import archive_aliases
+    from .models import Post
+
+    for alias in shard_aliases() + archive_aliases():
+        if alias != using:
+            Post.objects.using(alias).filter(group_id=instance.pk).update(
+                group=None
+            )
+
+
+class AuthorShardRouter:
+    def _instance_db(self, model, hints):
+        instance = hints.get("instance")
+        if instance is None:
+            return None
+        label = instance._meta.label_lower
+        if label == "posts.post" and instance._state.adding:
+            return shard_for_author(instance.author_id)
+        if label == "posts.comment" and instance._state.adding:
+            return self._instance_db(model, {"instance": instance.post})
+        if label in SHARDED_MODELS:
+            return instance._state.db
+        if (
+            label == settings.AUTH_USER_MODEL.lower()
+            and model._meta.label_lower == "posts.post"
+        ):
+            return shard_for_author(instance.pk)
+        return None
+
+    def db_for_read(self, model, **hints):
+        if not is_sharded():
+            return None
+        if model._meta.label_lower == "posts.authorshard":
+            return PRIMARY_DB
+        if model._meta.label_lower in SHARDED_MODELS:
+            return self._instance_db(model, hints)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return self.db_for_read(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not is_sharded():
+            return None
+        labels = {obj1._meta.label_lower, obj2._meta.label_lower}
+        if labels & set(SHARDED_MODELS):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if not is_sharded() or db == PRIMARY_DB:
+            return None
+        if db not in shard_aliases():
+            return None
+        return f"{app_label}.{model_name}" in SHARDED_MODELS
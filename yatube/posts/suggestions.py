@@ -0,0 +1,65 @@
+"""Рекомендации «на кого подписаться» на разреженных матрицах."""
+import numpy as np
+from scipy import sparse
+
+COFOLLOW_WEIGHT = 0.5
+
+
+def follow_matrix(users, authors):
+    """CSR-матрица подписок и массив настоящих id для её индексов."""
+    ids, inverse = np.unique(
+        np.concatenate([users, authors]), return_inverse=True
+    )
+    rows, cols = inverse[:len(users)], inverse[len(users):]
+    size = len(ids)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+        shape=(size, size),
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix, ids
+
+
+def cofollow_similarity(matrix, max_fanout):
+    followers = np.asarray(matrix.sum(axis=0)).ravel()
+    keep = (followers > 0) & (followers <= max_fanout)
+    trimmed = matrix @ sparse.diags(keep.astype(np.float32))
+    similarity = (trimmed.T @ trimmed).tocsr()
+    similarity.setdiag(0)
+    norm = np.sqrt(np.where(keep, followers, 1)).astype(np.float32)
+    scale = sparse.diags(1 / norm)
+    return (scale @ similarity @ scale).tocsr()
+
+
+def suggest(users, authors, top=5, max_fanout=1000, chunk=4096):
+    """Выдаёт ``(user_id, author_id, score, rank)`` по ``top`` на читателя."""
+    matrix, ids = follow_matrix(
+        np.asarray(users, dtype=np.int64), np.asarray(authors, dtype=np.int64)
+    )
+    similarity = cofollow_similarity(matrix, max_fanout)
+    for start in range(0, matrix.shape[0], chunk):
+        block = matrix[start:start + chunk]
+        scores = block @ matrix + COFOLLOW_WEIGHT * (block @ similarity)
+        # Убираем уже отслеживаемых и самого читателя.
+        size = block.shape[0]
+        itself = sparse.csr_matrix(
+            (np.ones(size), (np.arange(size), np.arange(start, start + size))),
+            shape=block.shape,
+        )
+        scores = scores - scores.multiply((block + itself) > 0)
+        scores.eliminate_zeros()
+        for offset in range(scores.shape[0]):
+            begin, end = scores.indptr[offset], scores.indptr[offset + 1]
+            if begin == end:
+                continue
+            data = scores.data[begin:end]
+            columns = scores.indices[begin:end]
+            best = np.argsort(-data, kind="stable")[:top]
+            for rank, position in enumerate(best):
+                yield (
+                    int(ids[start + offset]),
+                    int(ids[columns[position]]),
+                    float(data[position]),
+                    rank,
+                )
@@ -0,0 +1,166 @@
+"""Хэштеги и упоминания в текстах постов."""
+import re
+
+from django.contrib.auth import get_user_model
+
+from core.pagecache import purge_on_commit
+
+from .archive import archive_aliases
+from .sharding import posts_filter
+
+HASHTAG = re.compile(r"(?<![\w#&])#(\w+)")
+MENTION = re.compile(r"(?<![\w@])@([\w.@+-]+)")
+MAX_TAG_LENGTH: int = 100
+
+
+def extract_tags(text):
+    return {
+        tag.lower()
+        for tag in HASHTAG.findall(text)
+        if len(tag) <= MAX_TAG_LENGTH
+    }
+
+
+def extract_mentions(text):
+    # Точка в конце — скорее конец предложения, чем часть имени.
+    return {name.rstrip(".") for name in MENTION.findall(text)}
+
+
+def tag_tag(tag):
+    return f"tag:{tag}"
+
+
+def mentions_tag(user_id):
+    return f"mentions:{user_id}"
+
+
+def page_tags(tags, user_ids):
+    return [
+        *(tag_tag(tag) for tag in tags),
+        *(mentions_tag(pk) for pk in user_ids),
+    ]
+
+
+def indexed(post_id):
+    """Теги и id упомянутых пользователей, записанные для поста."""
+    from .models import Mention, PostTag
+
+    tags = set(
+        PostTag.objects.filter(post_id=post_id).values_list("tag", flat=True)
+    )
+    user_ids = set(
+        Mention.objects.filter(post_id=post_id).values_list(
+            "user_id", flat=True
+        )
+    )
+    return tags, user_ids
+
+
+def index_posts(posts):
+    """Приводит индекс в соответствие с текстами ``posts``."""
+    from .models import Mention, PostTag
+
+    posts = list(posts)
+    wanted_tags = {post.pk: extract_tags(post.text) for post in posts}
+    names = {post.pk: extract_mentions(post.text) for post in posts}
+    users = dict(
+        get_user_model().objects.filter(
+            username__in=set().union(*names.values())
+        ).values_list("username", "pk")
+    )
+    wanted_users = {
+        pk: {users[name] for name in found if name in users}
+        for pk, found in names.items()
+    }
+
+    ids = [post.pk for post in posts]
+    old_tags = {pk: set() for pk in ids}
+    for pk, tag in PostTag.objects.filter(post_id__in=ids).values_list(
+        "post_id", "tag"
+    ):
+        old_tags[pk].add(tag)
+    old_users = {pk: set() for pk in ids}
+    for pk, user_id in Mention.objects.filter(post_id__in=ids).values_list(
+        "post_id", "user_id"
+    ):
+        old_users[pk].add(user_id)
+
+    new_tags, new_mentions, stale = [], [], set()
+    for post in posts:
+        pk = post.pk
+        gone = old_tags[pk] - wanted_tags[pk]
+        if gone:
+            PostTag.objects.filter(post_id=pk, tag__in=gone).delete()
+        new_tags += [
+            PostTag(post_id=pk, tag=tag, pub_date=post.pub_date)
+            for tag in wanted_tags[pk] - old_tags[pk]
+        ]
+        gone = old_users[pk] - wanted_users[pk]
+        if gone:
+            Mention.objects.filter(post_id=pk, user_id__in=gone).delete()
+        new_mentions += [
+            Mention(post_id=pk, user_id=user_id, pub_date=post.pub_date)
+            for user_id in wanted_users[pk] - old_users[pk]
+        ]
+        stale.update(page_tags(
+            old_tags[pk] | wanted_tags[pk], old_users[pk] | wanted_users[pk]
+        ))
+    PostTag.objects.bulk_create(new_tags, ignore_conflicts=True)
+    Mention.objects.bulk_create(new_mentions, ignore_conflicts=True)
+    return stale
+
+
+def unindex_posts(ids):
+    from .models import Mention, PostTag
+
+    ids = list(ids)
+    tags = PostTag.objects.filter(post_id__in=ids)
+    mentions = Mention.objects.filter(post_id__in=ids)
+    stale = page_tags(
+        set(tags.values_list("tag", flat=True)),
+        set(mentions.values_list("user_id", flat=True)),
+    )
+    tags.delete()
+    mentions.delete()
+    return stale
+
+
+def posts_by_ids(ids, *related):
+    """Посты с ``ids`` в том же порядке; пропавших просто нет."""
+    from .models import Post
+
+    found = {post.pk: post for post in posts_filter(*related, pk__in=ids)}
+    missing = [pk for pk in ids if pk not in found]
+    for alias in archive_aliases():
+        if not missing:
+            break
+        found.update(
+            (post.pk, post)
+            for post in Post.objects.using(alias)
+            .filter(pk__in=missing)
+            .prefetch_related(*related)
+        )
+        missing = [pk for pk in ids if pk not in found]
+    return [found[pk] for pk in ids if pk in found]
+
+
+def post_loaded(sender, instance, **kwargs):
+    # ``text`` может быть отложен (``only``/``defer``): тогда без запроса.
+    instance._loaded_text = instance.__dict__.get("text")
+
+
+def post_saved(sender, instance, created, **kwargs):
+    if created or instance.text != instance._loaded_text:
+        stale = index_posts([instance])
+    else:
+        # Текст тот же, но лента показывает пост целиком.
+        stale = page_tags(*indexed(instance.pk))
+    instance._loaded_text = instance.text
+    if stale:
+        purge_on_commit(*stale)
+
+
+def post_deleted(sender, instance, **kwargs):
+    stale = unindex_posts([instance.pk])
+    if stale:
+        purge_on_commit(*stale)
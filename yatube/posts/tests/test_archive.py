@@ -0,0 +1,128 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from django.db import DatabaseError, IntegrityError
+
+from .. import counters
+from ..archive import ARCHIVE_ID_FLOOR, remove_rows
+from ..models import Comment, Post, User
+
+
+@override_settings(POST_ARCHIVE="archive", ARCHIVE_AFTER_DAYS=30)
+class ArchiveTests(TestCase):
+    databases = {"default", "archive"}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="TestVeteran")
+        cls.old_post = Post.objects.create(author=cls.user, text="Старый")
+        cls.new_post = Post.objects.create(author=cls.user, text="Новый")
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=timezone.now() - timedelta(days=100)
+        )
+        root = Comment.objects.create(
+            post=cls.old_post, author=cls.user, text="Старый коммент"
+        )
+        Comment.objects.create(
+            post=cls.old_post, author=cls.user, text="Ответ", parent=root
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ArchiveTests.user)
+        call_command("archive_posts", stdout=StringIO())
+
+    def test_old_posts_move_with_comments(self):
+        self.assertEqual(
+            list(Post.objects.values_list("pk", flat=True)),
+            [self.new_post.pk],
+        )
+        self.assertFalse(Comment.objects.exists())
+        archived = Post.objects.using("archive").get(pk=self.old_post.pk)
+        self.assertEqual(archived.comments.count(), 2)
+
+    def test_archived_post_is_found_by_detail_and_profile(self):
+        response = self.authorized_client.get(
+            reverse("posts:post_detail", args=[self.old_post.pk])
+        )
+        self.assertContains(response, "Старый коммент")
+
+        response = self.authorized_client.get(
+            reverse("posts:profile", args=[self.user.username])
+        )
+        self.assertEqual(
+            [post.text for post in response.context["page_obj"]],
+            ["Новый", "Старый"],
+        )
+
+    def test_comment_on_archived_post_stays_in_archive(self):
+        self.authorized_client.post(
+            reverse("posts:add_comment", args=[self.old_post.pk]),
+            {"text": "Поздний коммент"},
+        )
+        comment = Comment.objects.using("archive").get(text="Поздний коммент")
+
+        self.assertGreater(comment.pk, ARCHIVE_ID_FLOOR)
+        self.assertEqual(comment.depth, 0)
+
+    def test_comment_added_after_copy_keeps_post(self):
+        post = Post.objects.create(author=self.user, text="Обсуждаемый")
+        Comment.objects.create(post=post, author=self.user, text="Поздний")
+
+        with self.assertRaises(IntegrityError):
+            remove_rows("default", [post.pk], [])
+        self.assertTrue(Comment.objects.filter(post=post).exists())
+
+    def test_moved_posts_leave_cached_feed(self):
+        post = Post.objects.create(author=self.user, text="Уезжающий")
+        self.assertContains(self.authorized_client.get("/"), "Уезжающий")
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(days=100)
+        )
+
+        call_command("archive_posts", stdout=StringIO())
+
+        self.assertNotContains(self.authorized_client.get("/"), "Уезжающий")
+
+    @override_settings(VIEW_COUNTER_FLUSH_SECONDS=3600)
+    def test_failed_flush_requeues_only_unwritten_views(self):
+        counters.flush_views()
+        hot = Post.objects.filter(pk=self.new_post.pk)
+        archived = Post.objects.using("archive").filter(pk=self.old_post.pk)
+        views = hot.get().views, archived.get().views
+        counters.record_view(self.new_post)
+        counters.record_view(self.old_post)
+        add_views = counters._add_views
+
+        def archive_down(alias, counts):
+            if alias == "archive":
+                raise DatabaseError
+            return add_views(alias, counts)
+
+        with mock.patch.object(
+            counters, "_add_views", side_effect=archive_down
+        ), self.assertRaises(DatabaseError):
+            counters.flush_views()
+        self.assertEqual(counters.pending_views(self.new_post), 0)
+        self.assertEqual(counters.pending_views(self.old_post), 1)
+
+        counters.flush_views()
+        self.assertEqual(
+            (hot.get().views, archived.get().views),
+            (views[0] + 1, views[1] + 1),
+        )
+
+    @override_settings(POST_ARCHIVE="")
+    def test_disabled_archive(self):
+        with self.assertRaises(CommandError):
+            call_command("archive_posts", stdout=StringIO())
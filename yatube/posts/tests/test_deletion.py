@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..deletion import run, schedule_group, schedule_user
+from ..follows import followee_ids
+from ..models import (
+    Comment, DeletionJob, Follow, FollowSuggestion, Group, GroupStats,
+    MediaFile, Post, User
+)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xF9\x04"
+    b"\x01\x0A\x00\x01\x00\x2C\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02"
+    b"\x02\x4C\x01\x00\x3B"
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class DeletionJobTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="TestProlific")
+        self.reader = User.objects.create_user(username="TestReader")
+        self.group = Group.objects.create(
+            title="deleted", slug="deleted", description="deleted"
+        )
+        self.posts = [
+            Post.objects.create(
+                author=self.author, text=f"Пост {i}", group=self.group
+            )
+            for i in range(5)
+        ]
+        self.image_post = Post.objects.create(
+            author=self.author,
+            text="С картинкой",
+            image=SimpleUploadedFile("small.gif", SMALL_GIF, "image/gif"),
+        )
+        self.reader_post = Post.objects.create(
+            author=self.reader, text="Чужой пост", group=self.group
+        )
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text="Под удаляемым"
+        )
+        comment = Comment.objects.create(
+            post=self.reader_post, author=self.author, text="Удаляемый"
+        )
+        self.reply = Comment.objects.create(
+            post=self.reader_post,
+            author=self.reader,
+            text="Ответ",
+            parent=comment,
+        )
+        self.kept = Comment.objects.create(
+            post=self.reader_post, author=self.reader, text="Остаётся"
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=self.reader)
+        FollowSuggestion.objects.create(
+            user=self.reader, author=self.author, score=1, rank=1
+        )
+
+    def test_user_is_deleted_in_chunks(self):
+        image = os.path.join(TEMP_MEDIA_ROOT, self.image_post.image.name)
+        self.assertTrue(os.path.exists(image))
+        self.assertIn(self.author.pk, followee_ids(self.reader.pk))
+        reports = []
+
+        job = run(
+            schedule_user(self.author),
+            chunk_size=2,
+            report=lambda job: reports.append(job.done),
+        )
+
+        self.assertEqual(job.status, DeletionJob.DONE)
+        self.assertEqual(job.done, job.total)
+        self.assertEqual(reports, sorted(reports))
+        self.assertGreater(len(reports), 3)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+        self.assertEqual(
+            list(Comment.objects.values_list("pk", flat=True)),
+            [self.kept.pk],
+        )
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(FollowSuggestion.objects.exists())
+        self.assertNotIn(self.author.pk, followee_ids(self.reader.pk))
+        self.assertFalse(MediaFile.objects.exists())
+        call_command("collect_media", "--grace=0", stdout=StringIO())
+        self.assertFalse(os.path.exists(image))
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.top_author_ids, [self.reader.pk])
+
+    def test_user_is_anonymized(self):
+        run(schedule_user(self.author, anonymize=True))
+        self.author.refresh_from_db()
+
+        self.assertEqual(self.author.username, f"deleted-{self.author.pk}")
+        self.assertFalse(self.author.is_active)
+        self.assertFalse(self.author.has_usable_password())
+        self.assertEqual(self.author.posts.count(), 6)
+        self.assertTrue(Comment.objects.filter(pk=self.reply.pk).exists())
+        self.assertFalse(Follow.objects.exists())
+
+    def test_group_posts_are_detached(self):
+        run(schedule_group(self.group), chunk_size=2)
+
+        self.assertFalse(Group.objects.filter(pk=self.group.pk).exists())
+        self.assertFalse(GroupStats.objects.exists())
+        self.assertEqual(Post.objects.filter(group__isnull=True).count(), 7)
+
+    def test_command_runs_pending_jobs(self):
+        job = schedule_user(self.author)
+        out = StringIO()
+
+        call_command("run_deletions", "--chunk-size=3", stdout=out)
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, DeletionJob.DONE)
+        self.assertIn("(100%)", out.getvalue())
+        self.assertIsNotNone(job.finished)
@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..digests import send_digests
+from ..models import DigestEvent, Follow, Post, User
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend"
+)
+class DigestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="Writer")
+        cls.other = User.objects.create_user(username="OtherWriter")
+        cls.readers = [
+            User.objects.create_user(
+                username=f"reader{number}", email=f"reader{number}@test.ru"
+            )
+            for number in range(3)
+        ]
+        cls.silent = User.objects.create_user(username="NoEmail")
+        for reader in cls.readers + [cls.silent]:
+            Follow.objects.create(user=reader, author=cls.author)
+        Follow.objects.create(user=cls.readers[0], author=cls.other)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_creation_records_one_event(self):
+        post = Post.objects.create(author=self.author, text="Новость")
+        post.text = "Правка"
+        post.save()
+
+        self.assertEqual(
+            list(DigestEvent.objects.values_list("post_id", "author_id")),
+            [(post.pk, self.author.pk)],
+        )
+
+    def test_one_digest_per_reader_in_batches(self):
+        Post.objects.create(author=self.author, text="Первый пост")
+        Post.objects.create(author=self.author, text="Второй пост")
+        Post.objects.create(author=self.other, text="Чужой пост")
+
+        stats = send_digests(batch_size=2)
+
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            [reader.email for reader in self.readers],
+        )
+        self.assertEqual(stats["emails"], 3)
+        self.assertEqual(stats["batches"], 2)
+        self.assertEqual(stats["events"], 3)
+        first = next(
+            message for message in mail.outbox
+            if message.to == [self.readers[0].email]
+        )
+        self.assertEqual(first.subject, "Новые посты от ваших авторов: 3")
+        self.assertIn("Чужой пост", first.body)
+        self.assertNotIn("Чужой пост", mail.outbox[-1].body)
+        self.assertFalse(DigestEvent.objects.exists())
+
+    def test_command_without_events_sends_nothing(self):
+        out = StringIO()
+
+        call_command("send_digests", stdout=out)
+
+        self.assertEqual(mail.outbox, [])
+        self.assertIn("Событий: 0", out.getvalue())
@@ -1,3 +1,4 @@
+import hashlib
 import tempfile
 import shutil
 
@@ -61,11 +62,12 @@ class PostFormTests(TestCase):
         response = self.authorized_client.post(
             reverse("posts:new_post"), data=form_data
         )
+        digest = hashlib.sha256(small_gif).hexdigest()
 
         self.assertTrue(Post.objects.filter(
             text=form_data["text"],
             group=group,
-            image="posts/small.gif"
+            image=f"posts/{digest[:2]}/{digest}.gif"
         ).exists())
         self.assertRedirects(
             response,
@@ -0,0 +1,169 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from ..media import make_post_thumbnail, release, storage
+from ..models import MediaFile, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b"\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xF9\x04"
+    b"\x01\x0A\x00\x01\x00\x2C\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02"
+    b"\x02\x4C\x01\x00\x3B"
+)
+
+
+def upload(name):
+    return SimpleUploadedFile(name, SMALL_GIF, "image/gif")
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="TestMemer")
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # Файлы и кэш записей sorl живут дольше транзакции теста.
+        cache.clear()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(TEMP_MEDIA_ROOT, name)
+
+    def test_identical_uploads_share_one_file(self):
+        first = Post.objects.create(
+            author=self.user, text="Мем", image=upload("meme.GIF")
+        )
+        second = Post.objects.create(
+            author=self.user, text="Тот же мем", image=upload("copy.gif")
+        )
+        name = first.image.name
+
+        self.assertEqual(second.image.name, name)
+        self.assertRegex(name, r"^posts/[0-9a-f]{2}/[0-9a-f]{64}\.gif$")
+        self.assertEqual(MediaFile.objects.get(name=name).refs, 2)
+
+        first.delete()
+        self.assertFalse(release(name))
+        self.assertTrue(os.path.exists(self.path(name)))
+
+        second.delete()
+        self.assertTrue(release(name))
+        self.assertFalse(MediaFile.objects.filter(name=name).exists())
+        # Файл убирает сборщик мусора, а не последний пост.
+        self.assertTrue(os.path.exists(self.path(name)))
+        call_command("collect_media", "--grace=0", stdout=StringIO())
+        self.assertFalse(os.path.exists(self.path(name)))
+
+    def test_command_rehashes_existing_media(self):
+        plain = FileSystemStorage(location=TEMP_MEDIA_ROOT)
+        for name in ("posts/one.gif", "posts/two.gif"):
+            plain.save(name, ContentFile(SMALL_GIF))
+        Post.objects.bulk_create([
+            Post(author=self.user, text="Раз", image="posts/one.gif"),
+            Post(author=self.user, text="Два", image="posts/two.gif"),
+        ])
+        out = StringIO()
+
+        call_command("dedupe_media", stdout=out)
+
+        names = set(Post.objects.values_list("image", flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(os.path.exists(self.path(name)))
+        self.assertFalse(os.path.exists(self.path("posts/one.gif")))
+        self.assertFalse(os.path.exists(self.path("posts/two.gif")))
+        self.assertEqual(MediaFile.objects.get(name=name).refs, 2)
+        self.assertIn(f"освобождено: {len(SMALL_GIF)}", out.getvalue())
+
+    def test_collect_media_removes_orphans(self):
+        kept = Post.objects.create(
+            author=self.user, text="Нужная", image=upload("kept.gif")
+        )
+        plain = FileSystemStorage(location=TEMP_MEDIA_ROOT)
+        orphan = plain.save("posts/orphan.gif", ContentFile(SMALL_GIF))
+        thumbnail = get_thumbnail(ImageFile(orphan, storage()), "10x10")
+        stray = plain.save("cache/00/00/stray.gif", ContentFile(SMALL_GIF))
+        out = StringIO()
+
+        call_command("collect_media", "--dry-run", "--grace=0", stdout=out)
+
+        self.assertIn(orphan, out.getvalue())
+        self.assertIn(stray, out.getvalue())
+        self.assertTrue(os.path.exists(self.path(orphan)))
+
+        call_command("collect_media", "--grace=0", stdout=StringIO())
+
+        self.assertTrue(os.path.exists(self.path(kept.image.name)))
+        self.assertFalse(os.path.exists(self.path(orphan)))
+        self.assertFalse(os.path.exists(self.path(thumbnail.name)))
+        self.assertFalse(os.path.exists(self.path(stray)))
+        self.assertIsNone(default.kvstore.get(thumbnail))
+
+    def test_collect_media_keeps_fresh_files(self):
+        plain = FileSystemStorage(location=TEMP_MEDIA_ROOT)
+        name = plain.save("posts/uploading.gif", ContentFile(SMALL_GIF))
+
+        call_command("collect_media", stdout=StringIO())
+
+        self.assertTrue(os.path.exists(self.path(name)))
+
+    def test_collect_media_drops_dead_sorl_keys(self):
+        plain = FileSystemStorage(location=TEMP_MEDIA_ROOT)
+        name = plain.save("posts/gone.gif", ContentFile(SMALL_GIF))
+        source = ImageFile(name, storage())
+        thumbnail = get_thumbnail(source, "10x10")
+        os.remove(self.path(name))
+
+        call_command("collect_media", stdout=StringIO())
+
+        self.assertIsNone(default.kvstore.get(source))
+        self.assertIsNone(default.kvstore.get(thumbnail))
+        self.assertFalse(os.path.exists(self.path(thumbnail.name)))
+
+    def test_thumbnail_is_built_without_reading_files(self):
+        post = Post.objects.create(
+            author=self.user, text="Размер", image=upload("size.gif")
+        )
+        self.assertEqual((post.image_width, post.image_height), (1, 1))
+        made = make_post_thumbnail(post)
+        os.remove(self.path(post.image.name))
+        post = Post.objects.get(pk=post.pk)
+
+        with self.assertNumQueries(0):
+            thumbnail = post.thumbnail()
+
+        self.assertEqual(thumbnail.name, made.name)
+        self.assertEqual(thumbnail.size, [960, 339])
+        self.assertTrue(os.path.exists(self.path(thumbnail.name)))
+
+    def test_fill_image_sizes_backfills_old_posts(self):
+        plain = FileSystemStorage(location=TEMP_MEDIA_ROOT)
+        name = plain.save("posts/old.gif", ContentFile(SMALL_GIF))
+        Post.objects.bulk_create([
+            Post(author=self.user, text="Старый", image=name),
+        ])
+
+        call_command("fill_image_sizes", stdout=StringIO())
+
+        post = Post.objects.get(image=name)
+        self.assertEqual((post.image_width, post.image_height), (1, 1))
+        self.assertTrue(os.path.exists(self.path(post.thumbnail().name)))
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.paginator import Paginator
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Comment, Post, User
+from ..sharding import MergedPosts, posts_filter, shard_for_author
+
+SHARDS = ["default", "shard1", "shard2"]
+
+
+class ShardingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.first = User.objects.create_user(username="first")
+        cls.second = User.objects.create_user(username="second")
+        now = timezone.now()
+        for i in range(6):
+            author = cls.first if i % 2 else cls.second
+            post = Post.objects.create(author=author, text=f"Пост {i}")
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(minutes=i)
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_disabled_sharding_keeps_querysets(self):
+        self.assertIsInstance(posts_filter(), QuerySet)
+        self.assertEqual(shard_for_author(self.first.pk), "default")
+
+    @override_settings(POST_SHARDS=SHARDS)
+    def test_author_placement_is_stable(self):
+        placement = [shard_for_author(author_id) for author_id in range(50)]
+        cache.clear()
+
+        self.assertEqual(
+            placement,
+            [shard_for_author(author_id) for author_id in range(50)],
+        )
+        self.assertEqual(set(placement), set(SHARDS))
+
+    def test_merged_posts_keep_pub_date_order(self):
+        merged = MergedPosts(
+            [
+                Post.objects.filter(author=self.first),
+                Post.objects.filter(author=self.second),
+            ]
+        )
+        page = Paginator(merged, 4).get_page(1)
+
+        self.assertEqual(merged.count(), 6)
+        self.assertEqual(
+            [post.text for post in page],
+            [post.text for post in Post.objects.all()[:4]],
+        )
+
+
+@override_settings(POST_SHARDS=["default", "archive"])
+class MoveAuthorTests(TestCase):
+    databases = {"default", "archive"}
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="mover")
+        self.source = shard_for_author(self.author.pk)
+        self.target = next(
+            alias for alias in ["default", "archive"] if alias != self.source
+        )
+        self.post = Post.objects.using(self.source).create(
+            author=self.author, text="Давний"
+        )
+        self.comment = Comment.objects.using(self.source).create(
+            post=self.post, author=self.author, text="Давний коммент"
+        )
+        self.long_ago = timezone.now() - timedelta(days=400)
+        Post.objects.using(self.source).filter(pk=self.post.pk).update(
+            pub_date=self.long_ago
+        )
+        Comment.objects.using(self.source).filter(
+            pk=self.comment.pk
+        ).update(created=self.long_ago)
+
+    def test_move_keeps_ids_and_dates(self):
+        call_command(
+            "move_author", self.author.username, self.target,
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(shard_for_author(self.author.pk), self.target)
+        self.assertFalse(
+            Post.objects.using(self.source).filter(pk=self.post.pk).exists()
+        )
+        post = Post.objects.using(self.target).get(pk=self.post.pk)
+        comment = Comment.objects.using(self.target).get(pk=self.comment.pk)
+        self.assertEqual(post.pub_date, self.long_ago)
+        self.assertEqual(comment.created, self.long_ago)
+        self.assertEqual(comment.post_id, post.pk)
@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Mention, Post, PostTag, User
+from ..tagging import extract_mentions, extract_tags
+
+
+class TaggingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username="TestTagger")
+        cls.friend = User.objects.create_user(username="friend.of")
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_extract(self):
+        text = "Привет, @friend.of! #Котики и #котики, но не a#b и &#39;"
+
+        self.assertEqual(extract_tags(text), {"котики"})
+        self.assertEqual(extract_mentions(text), {"friend.of"})
+
+    def test_save_indexes_tags_and_mentions(self):
+        post = Post.objects.create(
+            author=self.author, text="#python с @friend.of и @nobody"
+        )
+
+        self.assertEqual(
+            list(PostTag.objects.values_list("post_id", "tag")),
+            [(post.pk, "python")],
+        )
+        self.assertEqual(
+            list(Mention.objects.values_list("post_id", "user_id")),
+            [(post.pk, self.friend.pk)],
+        )
+
+        post.text = "теперь #django"
+        post.save()
+
+        self.assertEqual(
+            list(PostTag.objects.values_list("tag", flat=True)), ["django"]
+        )
+        self.assertFalse(Mention.objects.exists())
+
+        post.delete()
+        self.assertFalse(PostTag.objects.exists())
+
+    def test_tag_feed_pages_by_cursor(self):
+        for number in range(12):
+            Post.objects.create(author=self.author, text=f"#Лента {number}")
+        Post.objects.create(author=self.author, text="без тегов")
+        url = reverse("posts:tag", args=["лента"])
+
+        first = self.client.get(url)
+        second = self.client.get(url, {"after": first.context["next_cursor"]})
+
+        texts = [post.text for post in first.context["posts"]]
+        self.assertEqual(texts[0], "#Лента 11")
+        self.assertEqual(len(texts), 10)
+        self.assertEqual(
+            [post.text for post in second.context["posts"]],
+            ["#Лента 1", "#Лента 0"],
+        )
+        self.assertIsNone(second.context["next_cursor"])
+
+    def test_mentions_feed_is_purged_on_new_post(self):
+        url = reverse("posts:mentions", args=[self.friend.username])
+        self.assertContains(self.client.get(url), "Постов пока нет")
+
+        Post.objects.create(author=self.author, text="Спасибо, @friend.of")
+
+        self.assertContains(self.client.get(url), "Спасибо, @friend.of")
+
+    def test_index_tags_backfills_existing_posts(self):
+        Post.objects.bulk_create([
+            Post(author=self.author, text="#старый пост для @friend.of"),
+        ])
+
+        call_command("index_tags", stdout=StringIO())
+
+        self.assertTrue(PostTag.objects.filter(tag="старый").exists())
+        self.assertTrue(Mention.objects.filter(user=self.friend).exists())
@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import FeedWatermark, Follow, Post, User
+from ..unread import UNREAD_LIMIT, badge, unread_count
+
+
+class UnreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username="Reader")
+        cls.author = User.objects.create_user(username="Author")
+        cls.stranger = User.objects.create_user(username="Stranger")
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_visit_resets_counter(self):
+        Post.objects.create(author=self.author, text="Первый")
+        Post.objects.create(author=self.stranger, text="Чужой")
+        self.assertEqual(unread_count(self.reader.pk), 1)
+
+        self.client.get(reverse("posts:follow_index"))
+        self.assertEqual(unread_count(self.reader.pk), 0)
+
+        Post.objects.create(author=self.author, text="Второй")
+        Post.objects.create(author=self.author, text="Третий")
+        self.assertEqual(unread_count(self.reader.pk), 2)
+
+        cache.clear()
+        self.assertEqual(unread_count(self.reader.pk), 2)
+        self.assertTrue(FeedWatermark.objects.filter(user=self.reader))
+
+    def test_counter_does_not_query_posts_when_cached(self):
+        Post.objects.create(author=self.author, text="Новый")
+        unread_count(self.reader.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.reader.pk), 1)
+
+    def test_endpoint_and_header_badge(self):
+        Post.objects.bulk_create([
+            Post(author=self.author, text=f"Пост {number}")
+            for number in range(UNREAD_LIMIT + 5)
+        ])
+
+        response = self.client.get(reverse("posts:follow_unread"))
+        page = self.client.get(reverse("posts:groups"))
+
+        self.assertEqual(
+            response.json(), {"unread": UNREAD_LIMIT + 1, "badge": "99+"}
+        )
+        self.assertContains(page, '<span class="badge bg-danger">99+</span>')
+        self.assertEqual(badge(0), "")
@@ -1,16 +1,32 @@
+import re
 import tempfile
 import shutil
+from datetime import timedelta
+from io import StringIO
 
-from django.test import TestCase, Client, override_settings
+from django.test import (
+    TestCase, TransactionTestCase, Client, override_settings
+)
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
 from django.urls import reverse
 from django import forms
 from django.conf import settings
-
-from ..models import Group, Post, User, Follow
+from django.utils import timezone
+from django.core.management import call_command
+
+from ..counters import flush_views
+from ..follows import followee_ids, is_following
+from ..models import (
+    Comment, Follow, FollowSuggestion, Group, GroupStats, Post, TrendScore,
+    User
+)
+from ..threads import threads_page
+from ..trending import bump, refresh
 
 POSTS_ON_PAGE: int = 10
+THREADS_ON_PAGE: int = 10
+REPLIES_PREVIEW: int = 3
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
@@ -210,6 +226,34 @@ class PostViewsTests(TestCase):
         post_on_index = response.context["page_obj"][0]
         self.assertEqual(post_on_index, post)
 
+    def test_main_page_cache_is_shared_by_all_users(self):
+        reader = User.objects.create_user(username="TestReader")
+        Follow.objects.create(user=reader, author=self.user)
+        reader_client = Client()
+        reader_client.force_login(reader)
+        anonymous = Client().get(reverse("posts:posts"))
+
+        self.assertNotIn("вы подписаны", anonymous.content.decode())
+
+        # Не через save(): запись поста очищает кэш главной страницы.
+        first = anonymous.context["page_obj"][0]
+        Post.objects.filter(pk=first.pk).update(
+            text="Пост после кэширования"
+        )
+        for client, username in (
+            (reader_client, reader.username),
+            (self.authorized_client, self.user.username),
+        ):
+            with self.subTest(username=username):
+                page = client.get(reverse("posts:posts")).content.decode()
+
+                self.assertNotIn("Пост после кэширования", page)
+                self.assertIn(f"Пользователь: {username}", page)
+                self.assertNotIn("<!--hole:", page)
+                self.assertEqual(
+                    "вы подписаны" in page, username == reader.username
+                )
+
 
 class FollowViewsTests(TestCase):
     @classmethod
@@ -259,6 +303,22 @@ class FollowViewsTests(TestCase):
             Follow.objects.filter(user=self.user, author=self.author).exists()
         )
 
+    def test_followee_cache_is_reloaded_after_change(self):
+        cache.clear()
+        followee_ids(self.user.pk)
+        self.authorized_follower.get(
+            reverse("posts:profile_follow", kwargs={"username": self.author})
+        )
+        with self.assertNumQueries(1):
+            self.assertTrue(is_following(self.user.pk, self.author.pk))
+        with self.assertNumQueries(0):
+            self.assertTrue(is_following(self.user.pk, self.author.pk))
+
+        self.authorized_follower.get(
+            reverse("posts:profile_unfollow", kwargs={"username": self.author})
+        )
+        self.assertFalse(is_following(self.user.pk, self.author.pk))
+
     def test_follow_feed(self):
         author_post = Post.objects.create(
             author=self.author,
@@ -302,3 +362,387 @@ class FollowViewsTests(TestCase):
         self.assertFalse(
             post_in_another_user_feed.filter(text=author_post.text).exists()
         )
+
+
+class CommentThreadsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="TestCommentator")
+        cls.post = Post.objects.create(author=cls.user, text="Тестовый пост")
+        cls.roots = [
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f"Коммент {i}"
+            )
+            for i in range(THREADS_ON_PAGE + 2)
+        ]
+        cls.replies = [
+            Comment.objects.create(
+                post=cls.post,
+                author=cls.user,
+                parent=cls.roots[0],
+                text=f"Ответ {i}",
+            )
+            for i in range(REPLIES_PREVIEW + 2)
+        ]
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(CommentThreadsTests.user)
+
+    def test_post_detail_shows_first_threads_with_preview(self):
+        response = self.guest_client.get(
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        )
+        comments = response.context["comments"]
+
+        self.assertEqual(
+            len(comments), THREADS_ON_PAGE + REPLIES_PREVIEW
+        )
+        self.assertEqual(comments[0], self.roots[0])
+        self.assertEqual(comments[1:REPLIES_PREVIEW + 1], self.replies[:3])
+        self.assertEqual(
+            comments[REPLIES_PREVIEW].more_replies, self.roots[0].pk
+        )
+        self.assertEqual(
+            response.context["next_cursor"], self.roots[THREADS_ON_PAGE - 1].pk
+        )
+
+    def test_page_reads_preview_of_each_thread(self):
+        comments, next_cursor = threads_page(self.post, threads=1, replies=1)
+
+        self.assertEqual(comments, [self.roots[0], self.replies[0]])
+        self.assertEqual(comments[-1].more_replies, self.roots[0].pk)
+        self.assertEqual(next_cursor, self.roots[0].pk)
+
+    def test_fragment_continues_after_cursor(self):
+        response = self.guest_client.get(
+            reverse("posts:post_comments", kwargs={"post_id": self.post.pk}),
+            {"after": self.roots[THREADS_ON_PAGE - 1].pk},
+        )
+
+        self.assertTemplateUsed(response, "includes/comment_list.html")
+        self.assertTemplateNotUsed(response, "base.html")
+        self.assertEqual(
+            response.context["comments"], self.roots[THREADS_ON_PAGE:]
+        )
+        self.assertIsNone(response.context["next_cursor"])
+
+    def test_fragment_loads_rest_of_thread(self):
+        response = self.guest_client.get(
+            reverse("posts:post_comments", kwargs={"post_id": self.post.pk}),
+            {
+                "thread": self.roots[0].pk,
+                "since": self.replies[REPLIES_PREVIEW - 1].path,
+            },
+        )
+
+        self.assertEqual(
+            response.context["comments"], self.replies[REPLIES_PREVIEW:]
+        )
+
+    def test_reply_is_stored_under_parent(self):
+        self.authorized_client.post(
+            reverse("posts:add_comment", kwargs={"post_id": self.post.pk}),
+            {"text": "Ответ на ответ", "parent": self.replies[0].pk},
+        )
+        reply = Comment.objects.get(text="Ответ на ответ")
+
+        self.assertEqual(reply.parent, self.replies[0])
+        self.assertTrue(reply.path.startswith(self.replies[0].path))
+        self.assertEqual(reply.depth, 2)
+
+
+@override_settings(VIEW_COUNTER_FLUSH_SECONDS=3600)
+class ViewCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        flush_views()
+        cls.user = User.objects.create_user(username="TestReader")
+        cls.post = Post.objects.create(author=cls.user, text="Тестовый пост")
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_views_are_buffered_until_flush(self):
+        url = reverse("posts:post_detail", kwargs={"post_id": self.post.pk})
+        self.guest_client.get(url)
+        response = self.guest_client.get(url)
+        self.post.refresh_from_db()
+
+        self.assertContains(response, "Просмотров: <span>2</span>")
+        self.assertEqual(self.post.views, 0)
+
+        flush_views()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.views, 2)
+        # Страница осталась в кэше, а счётчик читается из базы.
+        self.assertContains(
+            self.guest_client.get(url), "Просмотров: <span>3</span>"
+        )
+
+
+class FollowSuggestionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username="TestReader")
+        cls.friend = User.objects.create_user(username="TestFriend")
+        cls.author = User.objects.create_user(username="TestAuthor")
+        Follow.objects.create(user=cls.reader, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FollowSuggestionTests.reader)
+
+    def test_friends_of_friends_are_suggested(self):
+        call_command("compute_suggestions", stdout=StringIO())
+        response = self.authorized_client.get(reverse("posts:follow_index"))
+
+        suggested = reverse("posts:profile", args=[self.author.username])
+        self.assertContains(response, f'href="{suggested}"')
+        self.assertNotContains(
+            response, reverse("posts:profile", args=[self.friend.username])
+        )
+        self.assertFalse(
+            FollowSuggestion.objects.filter(
+                user=self.reader, author=self.friend
+            ).exists()
+        )
+
+
+class TrendingTests(TransactionTestCase):
+    # Комментарии засчитываются после коммита, поэтому без обёртки
+    # ``TestCase`` в транзакцию.
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username="TestTrendsetter")
+        self.group = Group.objects.create(
+            title="trending", slug="trending", description="trending"
+        )
+        self.quiet_post = Post.objects.create(author=self.user, text="Тихий")
+        self.hot_post = Post.objects.create(
+            author=self.user, text="Горячий", group=self.group
+        )
+        for post, count in ((self.quiet_post, 1), (self.hot_post, 3)):
+            for i in range(count):
+                Comment.objects.create(post=post, author=self.user, text="!")
+
+    def test_trending_feed_ranks_by_comments(self):
+        call_command("refresh_trending", stdout=StringIO())
+        response = self.guest_client.get(reverse("posts:trending"))
+
+        self.assertEqual(
+            list(response.context["page_obj"]),
+            [self.hot_post, self.quiet_post],
+        )
+        self.assertEqual(response.context["trending_groups"], [self.group])
+
+    def test_decayed_scores_rank_below_fresh_ones(self):
+        old = timezone.now() - timedelta(
+            hours=settings.TRENDING_HALF_LIFE_HOURS * 3
+        )
+        bump(TrendScore.POST, self.quiet_post.pk, 5, moment=old)
+
+        self.assertEqual(
+            refresh(TrendScore.POST), [self.hot_post.pk, self.quiet_post.pk]
+        )
+
+
+class GroupDirectoryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="TestGroupie")
+        cls.other = User.objects.create_user(username="TestOther")
+        cls.group = Group.objects.create(
+            title="first", slug="first", description="first"
+        )
+        cls.empty_group = Group.objects.create(
+            title="empty", slug="empty", description="empty"
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_rollup_follows_post_writes(self):
+        post = Post.objects.create(
+            author=self.user, text="Пост", group=self.group
+        )
+        Post.objects.create(author=self.other, text="Пост", group=self.group)
+        Post.objects.create(author=self.other, text="Пост", group=self.group)
+        stats = GroupStats.objects.get(group=self.group)
+
+        self.assertEqual(stats.posts_count, 3)
+        self.assertEqual(stats.top_author_ids, [self.other.pk, self.user.pk])
+
+        post.group = self.empty_group
+        post.save()
+        self.other.posts.first().delete()
+        stats.refresh_from_db()
+
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.top_author_ids, [self.other.pk])
+        self.assertEqual(
+            GroupStats.objects.get(group=self.empty_group).posts_count, 1
+        )
+
+    def test_directory_lists_groups_by_activity(self):
+        Post.objects.create(author=self.user, text="Пост", group=self.group)
+        response = self.guest_client.get(reverse("posts:groups"))
+        groups = response.context["groups"]
+
+        self.assertEqual(
+            [stats.group for stats in groups], [self.group, self.empty_group]
+        )
+        self.assertEqual(groups[0].authors, [self.user])
+        self.assertIsNone(response.context["next_cursor"])
+
+    def test_deleted_group_leaves_directory(self):
+        group = Group.objects.create(
+            title="gone", slug="gone", description="gone"
+        )
+        Post.objects.create(author=self.user, text="Пост", group=group)
+        group_id = group.pk
+        group.delete()
+
+        self.assertFalse(GroupStats.objects.filter(group_id=group_id).exists())
+        self.assertEqual(Post.objects.filter(group__isnull=True).count(), 1)
+
+
+class PageCacheInvalidationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username="TestCached")
+        cls.group = Group.objects.create(
+            title="cached", slug="cached", description="cached"
+        )
+        cls.other_group = Group.objects.create(
+            title="other", slug="other", description="other"
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text="Закэшированный", group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_page_is_rendered_once(self):
+        url = reverse("posts:post_detail", args=[self.post.pk])
+        self.guest_client.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        self.assertContains(response, "Закэшированный")
+
+    def test_comment_purges_post_page(self):
+        url = reverse("posts:post_detail", args=[self.post.pk])
+        self.guest_client.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.user, text="Свежий коммент"
+        )
+
+        self.assertContains(self.guest_client.get(url), "Свежий коммент")
+
+    def test_moved_post_purges_both_groups(self):
+        urls = [
+            reverse("posts:group", args=[group.slug])
+            for group in (self.group, self.other_group)
+        ]
+        for url in urls:
+            self.guest_client.get(url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = self.other_group
+        post.save()
+
+        old, new = (self.guest_client.get(url) for url in urls)
+        self.assertNotContains(old, "Закэшированный")
+        self.assertContains(new, "Закэшированный")
+
+    def test_renamed_group_purges_old_slug(self):
+        url = reverse("posts:group", args=[self.group.slug])
+        self.guest_client.get(url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = "renamed"
+        group.save()
+
+        self.assertEqual(self.guest_client.get(url).status_code, 404)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class JinjaFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        small_gif = (
+            b"\x47\x49\x46\x38\x39\x61\x02\x00"
+            b"\x01\x00\x80\x00\x00\x00\x00\x00"
+            b"\xFF\xFF\xFF\x21\xF9\x04\x00\x00"
+            b"\x00\x00\x00\x2C\x00\x00\x00\x00"
+            b"\x02\x00\x01\x00\x00\x02\x02\x0C"
+            b"\x0A\x00\x3B"
+        )
+        cls.user = User.objects.create_user(
+            username="TestJinja", first_name="Лев", last_name="Толстой"
+        )
+        cls.group = Group.objects.create(
+            title="jinja", slug="jinja", description="jinja"
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text="Длинный тестовый пост <b>с разметкой</b>",
+            group=cls.group,
+            image=SimpleUploadedFile(
+                name="jinja.gif", content=small_gif, content_type="image/gif"
+            ),
+        )
+        Post.objects.create(author=cls.user, text="Второй пост")
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text="Комментарий"
+        )
+        Follow.objects.create(user=cls.user, author=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def page(self, url, engine):
+        cache.clear()
+        with self.settings(FEED_TEMPLATE_ENGINE=engine):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        # Токены CSRF и счётчик просмотров меняются от запроса к запросу.
+        html = re.sub(
+            r'name="csrfmiddlewaretoken" value="[^"]*"|Просмотров: \S*',
+            "",
+            response.content.decode(),
+        )
+        return " ".join(html.split())
+
+    def test_jinja_feeds_match_django_templates(self):
+        urls = (
+            reverse("posts:posts"),
+            reverse("posts:group", kwargs={"slug": self.group.slug}),
+            reverse("posts:profile", kwargs={"username": self.user}),
+            reverse("posts:follow_index"),
+            reverse("posts:post_detail", kwargs={"post_id": self.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                jinja = self.page(url, "jinja2")
+
+                self.assertIn("с разметкой&lt;/b&gt;", jinja)
+                self.assertEqual(jinja, self.page(url, "django"))
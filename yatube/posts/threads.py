@@ -0,0 +1,84 @@
+"""Ветки комментариев на materialized path."""
+from django.db.models import prefetch_related_objects
+
+from .models import MAX_THREAD_DEPTH, PATH_DIGITS, Comment
+
+THREADS_BATCH: int = 10
+REPLIES_PREVIEW: int = 3
+
+# "/" < цифры < "~": строка "<путь корня>~" больше путей всех его ответов,
+# но меньше пути следующего корня. Поэтому следующий корень — первый путь
+# после "<путь корня>~": корни перебираются поиском по индексу
+# ``(post, path)``, а из каждой ветки читается не больше ``replies + 2``
+# строк.
+PAGE_SQL = """
+    WITH RECURSIVE roots(path, thread) AS (
+        SELECT (
+            SELECT path FROM {table}
+            WHERE post_id = %s AND path > %s ORDER BY path LIMIT 1
+        ), 1
+        UNION ALL
+        SELECT (
+            SELECT path FROM {table}
+            WHERE post_id = %s AND path > roots.path || '~'
+            ORDER BY path LIMIT 1
+        ), thread + 1
+        FROM roots
+        WHERE roots.path IS NOT NULL AND thread <= %s
+    )
+    SELECT comment.*, roots.thread AS thread
+    FROM roots JOIN {table} AS comment ON comment.id IN (
+        SELECT id FROM {table}
+        WHERE post_id = %s AND path >= roots.path
+            AND path < roots.path || '~'
+        ORDER BY path LIMIT %s
+    )
+    ORDER BY comment.path
+""".format(table=Comment._meta.db_table)
+
+
+def root_path(pk):
+    return f"{pk:0{PATH_DIGITS}d}/"
+
+
+def threads_page(post, after=None, threads=THREADS_BATCH,
+                 replies=REPLIES_PREVIEW):
+    """Страница веток после корня ``after`` и первые ``replies`` ответов."""
+    start = f"{root_path(after)}~" if after else ""
+    rows = Comment.objects.db_manager(post._state.db).raw(
+        PAGE_SQL, [post.pk, start, post.pk, threads, post.pk, replies + 2]
+    )
+    comments = []
+    root = next_cursor = None
+    for comment in rows:
+        if comment.thread > threads:
+            next_cursor = root.pk
+            break
+        if root is None or comment.thread != root.thread:
+            root, position = comment, 0
+        position += 1
+        if position > replies + 1:
+            comments[-1].more_replies = root.pk
+            continue
+        comments.append(comment)
+    prefetch_related_objects(comments, "author")
+    return comments, next_cursor
+
+
+def thread_comments(post, root_pk, since=""):
+    """Ветка (или её часть после пути ``since``) одним range-запросом."""
+    path = root_path(root_pk)
+    comments = post.comments.filter(path__gte=path, path__lt=f"{path}~")
+    if since:
+        comments = comments.filter(path__gt=since)
+    return list(comments.order_by("path").select_related("author"))
+
+
+def reply_parent(post, parent_pk):
+    """Комментарий, на который отвечают, с учётом предельной глубины."""
+    if not str(parent_pk).isdigit():
+        return None
+    parent = post.comments.filter(pk=parent_pk).first()
+    while parent is not None and parent.depth >= MAX_THREAD_DEPTH - 1:
+        parent = parent.parent
+    return parent
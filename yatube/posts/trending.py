@@ -0,0 +1,124 @@
+"""Популярные посты и группы с экспоненциальным затуханием."""
+import logging
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Exp, Greatest, Least, Ln
+from django.utils import timezone
+
+from core.pagecache import purge
+
+logger = logging.getLogger(__name__)
+
+COMMENT_WEIGHT = 1.0
+FOLLOW_WEIGHT = 3.0
+TRENDING_SIZE: int = 100
+TRENDING_TIMEOUT = 60 * 60
+# Строки, затухшие ниже этого веса, удаляются при пересчёте
+FORGET_BELOW = 0.01
+
+
+def decay_rate():
+    return math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 60 * 60)
+
+
+def trending_key(kind):
+    return f"trending:{kind}"
+
+
+def _logaddexp(score, value):
+    # log(e^score + e^value) в SQL: строка меняется одним UPDATE, без
+    # чтения, так что одновременные события не теряются.
+    value = Value(value, output_field=FloatField())
+    high, low = Greatest(score, value), Least(score, value)
+    return high + Ln(1 + Exp(low - high))
+
+
+def bump(kind, object_id, weight, moment=None):
+    from .models import TrendScore
+
+    moment = moment or timezone.now()
+    # score — логарифм суммы весов w * exp(λt): порядок по нему совпадает
+    # с порядком по затухшим значениям, и старые строки не пересчитываются.
+    value = math.log(weight) + decay_rate() * moment.timestamp()
+    trends = TrendScore.objects.filter(kind=kind, object_id=object_id)
+    if trends.update(score=_logaddexp(F("score"), value)):
+        return
+    try:
+        with transaction.atomic():
+            TrendScore.objects.create(
+                kind=kind, object_id=object_id, score=value
+            )
+    except IntegrityError:
+        # Строку только что создал параллельный запрос.
+        trends.update(score=_logaddexp(F("score"), value))
+
+
+def bump_post(post, weight):
+    from .models import TrendScore
+
+    bump(TrendScore.POST, post.pk, weight)
+    if post.group_id:
+        bump(TrendScore.GROUP, post.group_id, weight)
+
+
+def bump_on_commit(post, weight):
+    """Засчитывает событие после коммита; сбой не ломает запрос."""
+    def apply():
+        try:
+            bump_post(post, weight)
+        except DatabaseError:
+            logger.exception("Не удалось обновить популярное")
+
+    transaction.on_commit(apply)
+
+
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        bump_on_commit(instance.post, COMMENT_WEIGHT)
+
+
+def follow_saved(sender, instance, created, **kwargs):
+    from .sharding import author_posts
+
+    if not created:
+        return
+    latest = next(iter(author_posts(instance.author)[:1]), None)
+    if latest is not None:
+        bump_on_commit(latest, FOLLOW_WEIGHT)
+
+
+def forget_decayed(kind):
+    from .models import TrendScore
+
+    now = decay_rate() * timezone.now().timestamp()
+    deleted, _ = TrendScore.objects.filter(
+        kind=kind, score__lt=now + math.log(FORGET_BELOW)
+    ).delete()
+    return deleted
+
+
+def refresh(kind):
+    """Пересчитывает топ ``kind`` и кладёт его в кэш."""
+    from .models import TrendScore
+
+    ids = list(
+        TrendScore.objects.filter(kind=kind)
+        .order_by("-score")
+        .values_list("object_id", flat=True)[:TRENDING_SIZE]
+    )
+    previous = cache.get(trending_key(kind))
+    cache.set(trending_key(kind), ids, TRENDING_TIMEOUT)
+    if previous is not None and previous != ids:
+        purge("feed:trending")
+    return ids
+
+
+def trending_ids(kind):
+    ids = cache.get(trending_key(kind))
+    if ids is None:
+        ids = refresh(kind)
+    return ids
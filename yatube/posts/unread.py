@@ -0,0 +1,137 @@
+"""Счётчик новых постов в ленте подписок без подсчёта строк ``Post``."""
+from array import array
+from bisect import bisect_right, insort
+from datetime import datetime, timedelta, timezone
+
+from django.core.cache import cache
+
+from .follows import followee_ids
+from .sharding import shard_for_author
+
+RECENT_POSTS: int = 100
+UNREAD_LIMIT: int = 99
+UNREAD_TIMEOUT = 24 * 60 * 60
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def recent_key(author_id):
+    return f"recent_posts:{author_id}"
+
+
+def watermark_key(user_id):
+    return f"feed_seen:{user_id}"
+
+
+def micros(moment):
+    # Целые микросекунды: знак из базы точно совпадёт с временем поста.
+    return (moment - EPOCH) // MICROSECOND
+
+
+def _decode(data):
+    stamps = array("q")
+    stamps.frombytes(data)
+    return stamps
+
+
+def _load(author_id):
+    from .models import Post
+
+    dates = (
+        Post.objects.using(shard_for_author(author_id))
+        .filter(author_id=author_id)
+        .order_by("-pub_date")
+        .values_list("pub_date", flat=True)[:RECENT_POSTS]
+    )
+    stamps = array("q", sorted(micros(date) for date in dates))
+    cache.set(recent_key(author_id), stamps.tobytes(), UNREAD_TIMEOUT)
+    return stamps
+
+
+def recent_posts(author_ids):
+    """``{author_id: array}`` времён последних постов авторов."""
+    keys = {recent_key(pk): pk for pk in author_ids}
+    found = {
+        keys[key]: _decode(data)
+        for key, data in cache.get_many(list(keys)).items()
+    }
+    for pk in author_ids:
+        if pk not in found:
+            found[pk] = _load(pk)
+    return found
+
+
+def forget_authors(author_ids):
+    cache.delete_many([recent_key(pk) for pk in author_ids])
+
+
+def watermark(user_id):
+    seen = cache.get(watermark_key(user_id))
+    if seen is None:
+        from .models import FeedWatermark
+
+        moment = (
+            FeedWatermark.objects.filter(user_id=user_id)
+            .values_list("seen", flat=True)
+            .first()
+        )
+        seen = micros(moment) if moment else 0
+        cache.set(watermark_key(user_id), seen, UNREAD_TIMEOUT)
+    return seen
+
+
+def unread_count(user_id):
+    """Число новых постов ленты, не больше ``UNREAD_LIMIT + 1``."""
+    seen = watermark(user_id)
+    count = 0
+    for stamps in recent_posts(followee_ids(user_id)).values():
+        count += len(stamps) - bisect_right(stamps, seen)
+        if count > UNREAD_LIMIT:
+            return UNREAD_LIMIT + 1
+    return count
+
+
+def badge(count):
+    if count > UNREAD_LIMIT:
+        return f"{UNREAD_LIMIT}+"
+    return str(count) if count else ""
+
+
+def mark_seen(user_id):
+    """Сдвигает знак к самому новому посту подписок."""
+    from .models import FeedWatermark
+
+    newest = max(
+        (
+            stamps[-1]
+            for stamps in recent_posts(followee_ids(user_id)).values()
+            if stamps
+        ),
+        default=0,
+    )
+    if newest <= watermark(user_id):
+        return
+    FeedWatermark.objects.update_or_create(
+        user_id=user_id, defaults={"seen": EPOCH + newest * MICROSECOND}
+    )
+    cache.set(watermark_key(user_id), newest, UNREAD_TIMEOUT)
+
+
+def post_saved(sender, instance, created, **kwargs):
+    if not created:
+        return
+    data = cache.get(recent_key(instance.author_id))
+    if data is None:
+        # Ещё не загружено: соберётся из базы при первом чтении.
+        return
+    stamps = _decode(data)
+    insort(stamps, micros(instance.pub_date))
+    del stamps[:-RECENT_POSTS]
+    cache.set(
+        recent_key(instance.author_id), stamps.tobytes(), UNREAD_TIMEOUT
+    )
+
+
+def post_deleted(sender, instance, **kwargs):
+    forget_authors([instance.author_id])
@@ -6,15 +6,29 @@ app_name = "posts"
 
 urlpatterns = [
     path("", views.index, name="posts"),
+    path("trending/", views.trending, name="trending"),
     path("create/", views.post_create, name="new_post"),
     path("posts/<int:post_id>/edit/", views.post_edit, name="update_post"),
+    path("groups/", views.group_index, name="groups"),
     path("group/<slug:slug>/", views.group_posts, name="group"),
     path("profile/<str:username>/", views.profile, name="profile"),
+    path(
+        "profile/<str:username>/mentions/",
+        views.mentions,
+        name="mentions",
+    ),
+    path("tags/<str:tag>/", views.tag_posts, name="tag"),
     path("posts/<int:post_id>/", views.post_detail, name="post_detail"),
     path(
         "posts/<int:post_id>/comment/", views.add_comment, name="add_comment"
     ),
+    path(
+        "posts/<int:post_id>/comments/",
+        views.post_comments,
+        name="post_comments",
+    ),
     path("follow/", views.follow_index, name="follow_index"),
+    path("follow/unread/", views.follow_unread, name="follow_unread"),
     path(
         "profile/<str:username>/follow/",
         views.profile_follow,
@@ -1,10 +1,31 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.views.decorators.cache import never_cache
 
+from core.decorators import read_from_replica
+from core.pagecache import page_cache, tag_page
+from core.ratelimit import rate_limit
+
+from .cursors import keyset_page
+from .follows import followee_ids
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .fragments import follow_suggestions
+from .models import (
+    Follow, Group, GroupStats, Mention, PostTag, TrendScore, User
+)
+from .sharding import author_posts, get_post_or_404, posts_filter
+from .tagging import mentions_tag, posts_by_ids, tag_tag
+from .threads import reply_parent, thread_comments, threads_page
+from .trending import trending_ids
+from .unread import badge, mark_seen, unread_count
+
+
+TRENDING_GROUPS: int = 5
+GROUPS_ON_PAGE: int = 20
+TAGGED_ON_PAGE: int = 10
 
 
 def make_paginator(request, post_list):
@@ -15,55 +36,184 @@ def make_paginator(request, post_list):
     return page_obj
 
 
-@cache_page(20, key_prefix="index_page")
+def render_feed(request, template_name, context):
+    return render(
+        request, template_name, context, using=settings.FEED_TEMPLATE_ENGINE
+    )
+
+
+def trending_groups():
+    ids = trending_ids(TrendScore.GROUP)[:TRENDING_GROUPS]
+    groups = Group.objects.in_bulk(ids)
+    return [groups[pk] for pk in ids if pk in groups]
+
+
+@page_cache
+@read_from_replica
 def index(request):
-    post_list = Post.objects.all()
+    tag_page(request, "feed:index", "feed:trending")
+    post_list = posts_filter()
     page_obj = make_paginator(request, post_list)
 
-    context = {"page_obj": page_obj, "user": request.user}
-    return render(request, "posts/index.html", context)
+    context = {
+        "page_obj": page_obj,
+        "user": request.user,
+        "trending_groups": trending_groups(),
+    }
+    return render_feed(request, "posts/index.html", context)
 
 
+@page_cache
+@read_from_replica
+def trending(request):
+    page_obj = make_paginator(request, trending_ids(TrendScore.POST))
+    ids = page_obj.object_list
+    posts = {
+        post.pk: post for post in posts_filter("author", "group", pk__in=ids)
+    }
+    page_obj.object_list = [posts[pk] for pk in ids if pk in posts]
+    tag_page(request, "feed:trending", *(f"post:{pk}" for pk in posts))
+
+    context = {
+        "page_obj": page_obj,
+        "trending_groups": trending_groups(),
+    }
+    return render(request, "posts/trending.html", context)
+
+
+@page_cache
+@read_from_replica
 def group_posts(request, slug):
+    tag_page(request, f"group:{slug}")
     group = get_object_or_404(Group, slug=slug)
-    group_list = group.posts.all().select_related("group")
+    group_list = posts_filter("group", group=group)
     page_obj = make_paginator(request, group_list)
 
     context = {
         "group": group,
         "page_obj": page_obj,
     }
-    return render(request, "posts/group_list.html", context)
+    return render_feed(request, "posts/group_list.html", context)
+
+
+@page_cache
+@read_from_replica
+def group_index(request):
+    tag_page(request, "feed:groups")
+    groups, next_cursor = keyset_page(
+        GroupStats.objects.select_related("group"),
+        "last_activity",
+        request.GET.get("after"),
+        GROUPS_ON_PAGE,
+        descending=True,
+    )
+    authors = User.objects.in_bulk(
+        {pk for stats in groups for pk in stats.top_author_ids}
+    )
+    for stats in groups:
+        stats.authors = [
+            authors[pk] for pk in stats.top_author_ids if pk in authors
+        ]
+
+    context = {"groups": groups, "next_cursor": next_cursor}
+    return render(request, "posts/groups.html", context)
+
+
+def tagged_page(request, rows, title):
+    """Страница ленты по строкам ``PostTag``/``Mention``."""
+    rows, next_cursor = keyset_page(
+        rows,
+        "pub_date",
+        request.GET.get("after"),
+        TAGGED_ON_PAGE,
+        descending=True,
+    )
+    posts = posts_by_ids([row.post_id for row in rows], "author", "group")
+    tag_page(request, *(f"post:{post.pk}" for post in posts))
+
+    context = {"title": title, "posts": posts, "next_cursor": next_cursor}
+    return render(request, "posts/tagged.html", context)
 
 
+@page_cache
+@read_from_replica
+def tag_posts(request, tag):
+    tag = tag.lower()
+    tag_page(request, tag_tag(tag))
+    return tagged_page(request, PostTag.objects.filter(tag=tag), f"#{tag}")
+
+
+@page_cache
+@read_from_replica
+def mentions(request, username):
+    user = get_object_or_404(User, username=username)
+    tag_page(request, mentions_tag(user.pk))
+    return tagged_page(
+        request,
+        Mention.objects.filter(user=user),
+        f"Упоминания @{user.username}",
+    )
+
+
+@page_cache
+@read_from_replica
 def profile(request, username):
     user = get_object_or_404(User, username=username)
-    post_list = user.posts.all().select_related("author")
+    tag_page(request, f"author:{user.pk}")
+    post_list = author_posts(user, "author")
     page_obj = make_paginator(request, post_list)
 
-    following = (
-        request.user.is_authenticated
-        and Follow.objects.filter(user=request.user, author=user).exists()
-    )
-
-    context = {"username": user, "page_obj": page_obj, "following": following}
-    return render(request, "posts/profile.html", context)
+    context = {
+        "username": user,
+        "page_obj": page_obj,
+    }
+    return render_feed(request, "posts/profile.html", context)
 
 
+@page_cache
+@read_from_replica
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_post_or_404(post_id)
+    tag_page(request, f"post:{post.pk}", f"author:{post.author_id}")
+    if post.group_id:
+        tag_page(request, f"group:{post.group.slug}")
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    comments, next_cursor = threads_page(post)
 
     context = {
         "post": post,
         "form": form,
         "comments": comments,
+        "next_cursor": next_cursor,
     }
-    return render(request, "posts/post_detail.html", context)
+    return render_feed(request, "posts/post_detail.html", context)
+
+
+@read_from_replica
+def post_comments(request, post_id):
+    post = get_post_or_404(post_id)
+    thread = request.GET.get("thread", "")
+    after = request.GET.get("after", "")
+    if thread.isdigit():
+        comments = thread_comments(
+            post, int(thread), request.GET.get("since", "")
+        )
+        next_cursor = None
+    else:
+        comments, next_cursor = threads_page(
+            post, int(after) if after.isdigit() else None
+        )
+
+    context = {
+        "post": post,
+        "comments": comments,
+        "next_cursor": next_cursor,
+    }
+    return render(request, "includes/comment_list.html", context)
 
 
 @login_required
+@rate_limit("post_create")
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
@@ -81,7 +231,7 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_post_or_404(post_id)
     is_edit = True
     if post.author != request.user:
         return redirect("posts:post_detail", post_id)
@@ -104,30 +254,47 @@ def post_edit(request, post_id):
 
 
 @login_required
+@rate_limit("add_comment")
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_post_or_404(post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        comment.parent = reply_parent(post, request.POST.get("parent"))
         comment.save()
 
     return redirect("posts:post_detail", post_id=post_id)
 
 
 @login_required
+@read_from_replica
 def follow_index(request):
     user = get_object_or_404(User, username=request.user)
-    post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = posts_filter(author__in=list(followee_ids(request.user.pk)))
     page_obj = make_paginator(request, post_list)
 
-    context = {"page_obj": page_obj, "user": user}
+    mark_seen(request.user.pk)
+    context = {
+        "page_obj": page_obj,
+        "user": user,
+        "suggestions": follow_suggestions(request.user),
+    }
+
+    return render_feed(request, "posts/follow.html", context)
 
-    return render(request, "posts/follow.html", context)
+
+@login_required
+@never_cache
+def follow_unread(request):
+    count = unread_count(request.user.pk)
+    return JsonResponse({"unread": count, "badge": badge(count)})
 
 
+# Подписка и отписка — ссылки, то есть GET.
 @login_required
+@rate_limit("follow", methods=("GET", "POST"))
 def profile_follow(request, username):
     user = get_object_or_404(User, username=username)
     if request.user != user:
@@ -137,6 +304,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@rate_limit("follow", methods=("GET", "POST"))
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
@@ -40,37 +40,68 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.SnapshotMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.PrimaryPinMiddleware',
+    # Снаружи RateLimitMiddleware: метки есть и в странице 429.
+    'core.middleware.FragmentMiddleware',
+    'core.middleware.RateLimitMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware'
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [
-            os.path.join(BASE_DIR, 'templates/posts/'),
-            os.path.join(BASE_DIR, 'templates/')
-        ],
-        'APP_DIRS': True,
+        'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'OPTIONS': {
+            # Вне DEBUG шаблоны компилируются один раз на процесс;
+            # прогрев при старте — core.templating.warm_templates.
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'core.context_processors.year.year'
+                'core.context_processors.year.year',
+                'posts.context_processors.followees',
+            ],
+        },
+    },
+    {
+        # Jinja2-версии шаблонов ленты, включаются FEED_TEMPLATE_ENGINE
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(BASE_DIR, 'jinja2')],
+        'OPTIONS': {
+            'environment': 'core.jinja.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'core.context_processors.year.year',
+                'posts.context_processors.followees',
             ],
         },
     },
 ]
 
+# Каким движком рендерить ленты (index, group_list, profile, follow,
+# post_detail): 'django' или 'jinja2'
+FEED_TEMPLATE_ENGINE = 'django'
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
@@ -81,9 +112,49 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    'archive': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.archive.sqlite3'),
+    },
 }
 
+# Реплики только для чтения, например:
+# DATABASES['replica'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+#     'TEST': {'MIRROR': 'default'},
+# }
+# DATABASE_REPLICAS = ['replica']
+# Копия обновляется командой `python manage.py sync_replicas`.
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = [
+    'posts.archive.ArchiveRouter',
+    'posts.sharding.AuthorShardRouter',
+    'core.db_routers.PrimaryReplicaRouter',
+]
+
+# Алиасы баз, по которым распределяются посты и комментарии авторов.
+# Пустой список выключает шардирование. Новые шарды готовит команда
+# `python manage.py prepare_shards`, перенос автора — `move_author`.
+POST_SHARDS = []
+
+# База, куда `python manage.py archive_posts` переносит посты старше
+# ARCHIVE_AFTER_DAYS дней вместе с комментариями. Пустая строка выключает
+# архив; перед включением: `python manage.py migrate --database archive`.
+POST_ARCHIVE = ''
+ARCHIVE_AFTER_DAYS = 365
+
+# Сколько секунд после записи пользователь читает только с primary
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_COOKIE = 'pin_primary'
+
+# Период полураспада оценки популярности постов и групп
+TRENDING_HALF_LIFE_HOURS = 12
+
+# Как часто просмотры постов из памяти процесса сбрасываются в базу
+VIEW_COUNTER_FLUSH_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -123,6 +194,10 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+# `python manage.py collectstatic` собирает сюда файлы с хэшем в имени и
+# их .gz/.br копии; отдаёт их core.middleware.StaticFilesMiddleware.
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
 
 
 LOGIN_URL = 'users:login'
@@ -131,6 +206,8 @@ LOGIN_REDIRECT_URL = '/'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+# Адрес сайта для ссылок в письмах: у рассылки по cron нет запроса.
+SITE_URL = 'http://localhost:8000'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -141,8 +218,53 @@ CACHES = {
     }
 }
 
+# Публичные страницы (core.pagecache.page_cache) хранятся до очистки по
+# тегу, но не дольше PAGE_CACHE_TIMEOUT секунд. PAGE_CACHE_SURROGATE_KEYS
+# добавляет к ответам заголовок Surrogate-Key с тегами страницы для CDN.
+PAGE_CACHE_TIMEOUT = 60 * 5
+PAGE_CACHE_SURROGATE_KEYS = False
+
+# Каталог статических снимков первых страниц для анонимов
+# (core.snapshots); пустая строка выключает. Снимки страниц из
+# SNAPSHOT_PAGES ("имя url": число страниц) перерисовываются через
+# SNAPSHOT_DEBOUNCE_SECONDS после очистки их тегов в кэше страниц; первый
+# раз — `python manage.py publish_snapshots`, а по cron —
+# `python manage.py publish_snapshots --if-pending`.
+SNAPSHOT_ROOT = ''
+SNAPSHOT_PAGES = {
+    'posts:posts': 3,
+}
+SNAPSHOT_DEBOUNCE_SECONDS = 5
+
+# Лимиты token bucket: "<запросов>/<s|m|h|d>" на пользователя и на IP.
+# "write" действует на все изменяющие запросы, остальные — на отдельные
+# представления через core.ratelimit.rate_limit. Корзины должны лежать в
+# общем для всех воркеров кэше (memcached и т.п.): LocMemCache у каждого
+# процесса свой, о чём предупреждает `python manage.py check --deploy`.
+RATE_LIMIT_CACHE = 'default'
+RATE_LIMITS = {
+    'write': '300/m',
+    'post_create': '20/m',
+    'add_comment': '30/m',
+    'follow': '60/m',
+}
+
+# Ответы, которые core.middleware.CompressionMiddleware сжимает на лету
+COMPRESS_MIN_SIZE = 500
+COMPRESS_TYPES = [
+    'text/html',
+    'text/plain',
+    'text/css',
+    'application/javascript',
+    'application/json',
+    'image/svg+xml',
+]
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Шаблоны приложений ищет app_directories.Loader из TEMPLATE_LOADERS
+SILENCED_SYSTEM_CHECKS = ['debug_toolbar.W006']
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]